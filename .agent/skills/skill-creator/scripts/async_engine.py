@@ -0,0 +1,146 @@
+"""asyncio engine for run_eval trigger probes.
+
+The default engine runs each probe in a ProcessPoolExecutor worker that in
+turn spawns `claude -p` and polls it with select(), so every probe costs two
+processes and up to a second of polling latency. This engine drives all
+`claude -p` children from a single event loop instead, reading their
+stream-json output as it arrives, with a semaphore bounding concurrency.
+
+AsyncioExecutor implements the concurrent.futures.Executor interface so
+run_eval can schedule work on either engine the same way.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, Future
+
+from scripts.run_eval import ProbeTimeout, claude_command, claude_env, probe_record, write_command_file
+from scripts.stream_json import NDJSONReader, TriggerDetector, UsageMeter
+
+STREAM_CHUNK = 65536
+
+
+async def _read_decision(
+    process: asyncio.subprocess.Process,
+    detector: TriggerDetector,
+    meter: UsageMeter,
+    timing: dict,
+) -> bool:
+    """Consume stream-json output until the trigger decision is known.
+
+    Stores the monotonic time of the first event in timing["first_event"] and
+    feeds every event read to meter.
+    Raises RuntimeError if the output ends undecided and claude exited non-zero.
+    """
+    reader = NDJSONReader()
+    while True:
+        chunk = await process.stdout.read(STREAM_CHUNK)
+        decision = None
+        for event in reader.feed(chunk) if chunk else reader.close():
+            timing["first_event"] = timing["first_event"] or time.monotonic()
+            meter.feed(event)
+            if decision is None:
+                decision = detector.feed(event)
+        if decision is not None:
+            return decision
+        if not chunk:
+            returncode = await process.wait()
+            if returncode != 0:
+                raise RuntimeError(f"claude -p exited {returncode}")
+            return False
+
+
+async def run_single_query_async(
+    query: str,
+    skill_name: str,
+    skill_description: str,
+    timeout: int,
+    project_root: str,
+    model: str | None = None,
+    clean_name: str | None = None,
+) -> dict:
+    """Async counterpart of run_eval.run_single_query.
+
+    Same command file handling, CLI flags, early detection on stream events
+    and errors; the process is killed as soon as a decision is reached or the
+    timeout expires.
+    """
+    command_file = None
+    if clean_name is None:
+        clean_name, command_file = write_command_file(project_root, skill_name, skill_description)
+    try:
+        started = time.monotonic()
+        process = await asyncio.create_subprocess_exec(
+            *claude_command(query, model),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            cwd=project_root,
+            env=claude_env(),
+        )
+        spawned = time.monotonic()
+        detector = TriggerDetector(clean_name)
+        meter = UsageMeter()
+        timing = {"first_event": None}
+        try:
+            decision = await asyncio.wait_for(_read_decision(process, detector, meter, timing), timeout)
+            decided = time.monotonic()
+        except asyncio.TimeoutError:
+            first_event = timing["first_event"]
+            raise ProbeTimeout(
+                f"no trigger decision within {timeout}s",
+                {"spawn_s": round(spawned - started, 3),
+                 "first_event_s": round(first_event - started, 3) if first_event else None,
+                 "usage": meter.record()},
+            ) from None
+        finally:
+            # Clean up process on any exit path (return, exception, timeout, cancel)
+            killed = process.returncode is None
+            if killed:
+                process.kill()
+                await process.wait()
+
+        return probe_record(
+            decision, detector.detected_by or "end_of_output",
+            started, spawned, timing["first_event"], decided, killed, meter.record(),
+        )
+    finally:
+        if command_file is not None and command_file.exists():
+            command_file.unlink()
+
+
+class AsyncioExecutor(Executor):
+    """Executor that runs coroutine functions on a private event loop thread.
+
+    submit(fn, *args) expects fn to be a coroutine function and returns a
+    concurrent.futures.Future, so callers can use wait()/as_completed() just
+    as with a process pool. At most max_workers coroutines run at once.
+    """
+
+    def __init__(self, max_workers: int):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+    async def _bounded(self, fn, args, kwargs):
+        async with self._semaphore:
+            return await fn(*args, **kwargs)
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        return asyncio.run_coroutine_threadsafe(self._bounded(fn, args, kwargs), self._loop)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        if cancel_futures:
+            for task in asyncio.all_tasks(self._loop):
+                self._loop.call_soon_threadsafe(task.cancel)
+        if wait:
+            async def drain():
+                tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            asyncio.run_coroutine_threadsafe(drain(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if wait:
+            self._thread.join()
+            self._loop.close()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Benchmark run_eval throughput offline, against fake_claude.py.
+
+Puts a `claude` shim for fake_claude.py first on PATH, builds synthetic eval
+sets of the requested sizes (half should-trigger, a few deliberately
+ambiguous) and drives run_eval over them once per engine, reporting:
+
+- probes/sec and queries/sec over wall time
+- p50/p99 of the fake CLI's own time-to-decision, and of the harness's
+  time-to-decision as recorded in the run_eval summary
+- harness overhead: mean per-probe wall time not spent inside the fake
+  before it decided (process spawn, interpreter start, parsing, kill, gaps)
+- CPU seconds used by the harness and by its child processes
+- tokens and cost as accounted from the stream (see stream_json.UsageMeter)
+
+`--engines warm` compares warm streaming-input sessions against one-shot
+spawns; the fake pays its startup delay once per session there, so the
+difference in probes/sec is the per-query startup cost removed.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from scripts.run_eval import run_eval
+from scripts.utils import percentile
+
+FAKE_CLAUDE = Path(__file__).resolve().parent / "fake_claude.py"
+
+
+def install_fake_claude(bin_dir: Path) -> None:
+    """Write a `claude` shim into bin_dir and put bin_dir first on PATH."""
+    shim = bin_dir / "claude"
+    shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_CLAUDE}" "$@"\n')
+    shim.chmod(shim.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+
+
+def make_eval_set(size: int, seed: int = 0) -> tuple[list[dict], dict[str, float]]:
+    """Return (eval_set, per-query trigger probabilities) for the fake CLI."""
+    rng = random.Random(seed)
+    eval_set = []
+    probabilities = {}
+    for i in range(size):
+        should_trigger = i % 2 == 0
+        query = f"synthetic query {i}: please help with task {rng.randint(0, 10**6)}"
+        eval_set.append({"query": query, "should_trigger": should_trigger})
+        if i % 10 == 9:
+            probabilities[query] = 0.5
+        else:
+            probabilities[query] = 0.9 if should_trigger else 0.05
+    return eval_set, probabilities
+
+
+def bench_once(
+    size: int,
+    engine: str,
+    num_workers: int,
+    runs_per_query: int,
+    timeout: int,
+    fake_config: dict,
+    work_dir: Path,
+    run_eval_kwargs: dict | None = None,
+) -> dict:
+    """Run one run_eval against the fake CLI and return its measurements."""
+    eval_set, probabilities = make_eval_set(size)
+    config = json.loads(json.dumps(fake_config))
+    config.setdefault("trigger_probability", {})["queries"] = probabilities
+    config_path = work_dir / f"fake_config_{engine}_{size}.json"
+    config_path.write_text(json.dumps(config))
+    log_path = work_dir / f"fake_log_{engine}_{size}.jsonl"
+    log_path.unlink(missing_ok=True)
+    os.environ["FAKE_CLAUDE_CONFIG"] = str(config_path)
+    os.environ["FAKE_CLAUDE_LOG"] = str(log_path)
+
+    self_before = resource.getrusage(resource.RUSAGE_SELF)
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    t0 = time.monotonic()
+    output = run_eval(
+        eval_set=eval_set,
+        skill_name="bench",
+        description="Benchmark skill description",
+        num_workers=num_workers,
+        timeout=timeout,
+        project_root=work_dir,
+        runs_per_query=runs_per_query,
+        engine=engine,
+        **(run_eval_kwargs or {}),
+    )
+    wall = time.monotonic() - t0
+    self_after = resource.getrusage(resource.RUSAGE_SELF)
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    entries = [json.loads(line) for line in log_path.read_text().splitlines()] if log_path.exists() else []
+    decided = [e["decided"] - e["start"] for e in entries if "decided" in e]
+    probes = len(entries)
+    concurrency = min(num_workers, probes) or 1
+    overhead = (wall * concurrency / probes - sum(decided) / len(decided)) if probes and decided else None
+
+    return {
+        "engine": engine,
+        "queries": size,
+        "probes": probes,
+        "num_workers": num_workers,
+        "wall_s": round(wall, 2),
+        "probes_per_s": round(probes / wall, 2) if wall else None,
+        "queries_per_s": round(size / wall, 2) if wall else None,
+        "fake_decision_p50_s": round(percentile(decided, 50), 3) if decided else None,
+        "fake_decision_p99_s": round(percentile(decided, 99), 3) if decided else None,
+        "harness_decision_p50_s": (output["summary"]["latency"]["decision_s"] or {}).get("p50"),
+        "harness_decision_p99_s": (output["summary"]["latency"]["decision_s"] or {}).get("p99"),
+        "harness_overhead_per_probe_s": round(overhead, 3) if overhead is not None else None,
+        "cpu_harness_s": round(
+            (self_after.ru_utime - self_before.ru_utime) + (self_after.ru_stime - self_before.ru_stime), 2),
+        "cpu_children_s": round(
+            (children_after.ru_utime - children_before.ru_utime)
+            + (children_after.ru_stime - children_before.ru_stime), 2),
+        "passed": output["summary"]["passed"],
+        "errors": output["summary"]["errors"],
+        "warm": output["summary"].get("warm"),
+        "usage": output["summary"]["usage"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark run_eval throughput against a local fake claude")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Eval set sizes (queries)")
+    parser.add_argument("--engines", nargs="+", default=["pool", "asyncio"], choices=["pool", "asyncio", "warm"])
+    parser.add_argument("--num-workers", type=int, default=32, help="Parallel probes")
+    parser.add_argument("--runs-per-query", type=int, default=1, help="Runs per query")
+    parser.add_argument("--timeout", type=int, default=30, help="Timeout per probe in seconds")
+    parser.add_argument("--fake-config", default=None, help="JSON config for fake_claude.py (latency, failures)")
+    args = parser.parse_args()
+
+    fake_config = json.loads(Path(args.fake_config).read_text()) if args.fake_config else {}
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="bench-eval-") as tmp:
+        work_dir = Path(tmp)
+        bin_dir = work_dir / "bin"
+        bin_dir.mkdir()
+        install_fake_claude(bin_dir)
+        for size in args.sizes:
+            for engine in args.engines:
+                row = bench_once(size, engine, args.num_workers, args.runs_per_query, args.timeout, fake_config, work_dir)
+                rows.append(row)
+                print(
+                    f"{engine:>8} {size:>5} queries: {row['probes_per_s']:>7} probes/s, "
+                    f"decision p50={row['fake_decision_p50_s']}s p99={row['fake_decision_p99_s']}s "
+                    f"(harness {row['harness_decision_p50_s']}s/{row['harness_decision_p99_s']}s), "
+                    f"overhead/probe={row['harness_overhead_per_probe_s']}s, "
+                    f"cpu harness={row['cpu_harness_s']}s children={row['cpu_children_s']}s",
+                    file=sys.stderr,
+                )
+
+    print(json.dumps({"num_workers": args.num_workers, "runs_per_query": args.runs_per_query, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
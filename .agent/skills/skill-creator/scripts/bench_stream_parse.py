@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Microbenchmark stream-json parsing for trigger detection.
+
+Builds a synthetic multi-megabyte `claude -p --output-format stream-json`
+capture (long text deltas, then a tool call whose input is streamed in many
+small input_json_delta pieces) and times the string-concatenation read loop
+run_single_query used to have against NDJSONReader + TriggerDetector, feeding
+both the same fixed-size chunks.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from scripts.stream_json import NDJSONReader, TriggerDetector
+
+CLEAN_NAME = "bench-skill-0123abcd"
+
+
+def build_capture(size_mb: float, delta_chars: int = 40) -> bytes:
+    """Return a stream-json capture of roughly size_mb megabytes."""
+    target = int(size_mb * 1024 * 1024)
+    lines = [json.dumps({"type": "system", "subtype": "init"})]
+    size = 0
+    text = "lorem ipsum dolor sit amet, consectetur adipiscing elit " * 4
+    lines.append(json.dumps({"type": "stream_event", "event": {
+        "type": "content_block_start", "content_block": {"type": "text"}}}))
+    # Two thirds of the capture is prose, the rest streamed tool input
+    while size < target * 2 // 3:
+        line = json.dumps({"type": "stream_event", "event": {
+            "type": "content_block_delta", "delta": {"type": "text_delta", "text": text}}})
+        lines.append(line)
+        size += len(line) + 1
+    lines.append(json.dumps({"type": "stream_event", "event": {"type": "content_block_stop"}}))
+    lines.append(json.dumps({"type": "stream_event", "event": {
+        "type": "content_block_start", "content_block": {"type": "tool_use", "name": "Read"}}}))
+    filler = "x" * delta_chars
+    while size < target:
+        line = json.dumps({"type": "stream_event", "event": {
+            "type": "content_block_delta", "delta": {"type": "input_json_delta", "partial_json": filler}}})
+        lines.append(line)
+        size += len(line) + 1
+    # The name only shows up at the very end, split across two deltas
+    half = len(CLEAN_NAME) // 2
+    for piece in (CLEAN_NAME[:half], CLEAN_NAME[half:] + ".md\"}"):
+        lines.append(json.dumps({"type": "stream_event", "event": {
+            "type": "content_block_delta", "delta": {"type": "input_json_delta", "partial_json": piece}}}))
+    lines.append(json.dumps({"type": "stream_event", "event": {"type": "content_block_stop"}}))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def legacy_parse(chunks: list[bytes]) -> bool | None:
+    """The original read loop: str concatenation, split per line, growing JSON string."""
+    buffer = ""
+    pending_tool_name = None
+    accumulated_json = ""
+    for chunk in chunks:
+        buffer += chunk.decode("utf-8", errors="replace")
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if event.get("type") != "stream_event":
+                continue
+            se = event.get("event", {})
+            se_type = se.get("type", "")
+            if se_type == "content_block_start":
+                cb = se.get("content_block", {})
+                if cb.get("type") == "tool_use":
+                    if cb.get("name", "") in ("Skill", "Read"):
+                        pending_tool_name = cb["name"]
+                        accumulated_json = ""
+                    else:
+                        return False
+            elif se_type == "content_block_delta" and pending_tool_name:
+                delta = se.get("delta", {})
+                if delta.get("type") == "input_json_delta":
+                    accumulated_json += delta.get("partial_json", "")
+                    if CLEAN_NAME in accumulated_json:
+                        return True
+            elif se_type in ("content_block_stop", "message_stop"):
+                if pending_tool_name:
+                    return CLEAN_NAME in accumulated_json
+    return None
+
+
+def incremental_parse(chunks: list[bytes]) -> bool | None:
+    """NDJSONReader + TriggerDetector, as used by run_single_query."""
+    reader = NDJSONReader()
+    detector = TriggerDetector(CLEAN_NAME)
+    for chunk in chunks:
+        for event in reader.feed(chunk):
+            decision = detector.feed(event)
+            if decision is not None:
+                return decision
+    return None
+
+
+def time_parser(fn, chunks: list[bytes], repeats: int) -> tuple[float, bool | None]:
+    """Return (best wall time in seconds, decision) over repeats."""
+    best = float("inf")
+    decision = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        decision = fn(chunks)
+        best = min(best, time.perf_counter() - t0)
+    return best, decision
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stream-json parsing for trigger detection")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 4, 16], help="Capture sizes to test")
+    parser.add_argument("--chunk-size", type=int, default=8192, help="Bytes per simulated os.read()")
+    parser.add_argument("--repeats", type=int, default=3, help="Take the best of this many runs")
+    args = parser.parse_args()
+
+    rows = []
+    for size_mb in args.sizes_mb:
+        capture = build_capture(size_mb)
+        chunks = [capture[i:i + args.chunk_size] for i in range(0, len(capture), args.chunk_size)]
+        legacy_s, legacy_decision = time_parser(legacy_parse, chunks, args.repeats)
+        new_s, new_decision = time_parser(incremental_parse, chunks, args.repeats)
+        if legacy_decision != new_decision:
+            print(f"Error: parsers disagree at {size_mb} MB ({legacy_decision} vs {new_decision})", file=sys.stderr)
+            sys.exit(1)
+        rows.append({
+            "size_mb": round(len(capture) / (1024 * 1024), 2),
+            "legacy_s": round(legacy_s, 4),
+            "incremental_s": round(new_s, 4),
+            "speedup": round(legacy_s / new_s, 2) if new_s else None,
+            "incremental_mb_per_s": round(len(capture) / (1024 * 1024) / new_s, 1) if new_s else None,
+        })
+        print(
+            f"{rows[-1]['size_mb']:>7} MB  legacy {legacy_s:8.3f}s  incremental {new_s:8.3f}s  "
+            f"({rows[-1]['speedup']}x)",
+            file=sys.stderr,
+        )
+
+    print(json.dumps({"chunk_size": args.chunk_size, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
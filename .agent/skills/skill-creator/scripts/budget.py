@@ -0,0 +1,95 @@
+"""Resource budgets for run_loop.
+
+Without limits a description run ends on all-train-passed or max iterations,
+so it may take two minutes or an hour. A Budget caps wall time, CLI calls
+(eval probes plus improve_description calls) and the tokens both use.
+run_loop charges it after every step and asks it, before scheduling the next
+one, whether the planned work fits: costs are predicted from the per-probe
+and per-improvement time and tokens observed so far, and the loop trims
+candidates or runs per query to fit, or stops with the exhausted budget as
+its exit reason. Before the first evaluation only the CLI call count can be
+predicted; when not even one run per query fits, run_loop evaluates a
+balanced sample of the queries instead.
+"""
+
+import time
+
+from scripts.stream_json import USAGE_FIELDS
+
+# exit_reason prefix for each limit, named after its CLI flag
+LIMIT_NAMES = {"time_s": "time_budget", "cli_calls": "max_cli_calls", "tokens": "token_budget"}
+
+
+class Budget:
+    """Limits on wall time, CLI calls and tokens; any of them may be None."""
+
+    def __init__(self, time_s: float | None = None, cli_calls: int | None = None, tokens: int | None = None):
+        self.limits = {"time_s": time_s, "cli_calls": cli_calls, "tokens": tokens}
+        self.start = time.monotonic()
+        self.cli_calls = 0
+        self.tokens = 0
+        # Observed rates, for predicting what the next step costs
+        self.seconds_per_probe: float | None = None
+        self.tokens_per_probe: float | None = None
+        self.seconds_per_improve: float | None = None
+        self.tokens_per_improve: float | None = None
+
+    @property
+    def limited(self) -> bool:
+        return any(limit is not None for limit in self.limits.values())
+
+    def used(self) -> dict:
+        return {
+            "time_s": round(time.monotonic() - self.start, 2),
+            "cli_calls": self.cli_calls,
+            "tokens": self.tokens,
+        }
+
+    def charge_eval(self, calls: int, usage: dict, elapsed: float | None) -> None:
+        """Record an evaluation step: probes run, their summed usage and wall time.
+
+        Pass elapsed=None for work done before this process (a resumed run)
+        so it counts against the limits without skewing the observed rates.
+        """
+        tokens = sum(usage.get(field, 0) for field in USAGE_FIELDS)
+        self.cli_calls += calls
+        self.tokens += tokens
+        if calls and elapsed is not None:
+            self.seconds_per_probe = elapsed / calls
+            self.tokens_per_probe = tokens / calls
+
+    def charge_improve(self, calls: int, elapsed: float, usage: dict | None = None) -> None:
+        """Record an improvement step of `calls` parallel improve_description
+        calls, with their summed usage.
+        """
+        tokens = sum(usage.get(field, 0) for field in USAGE_FIELDS) if usage else 0
+        self.cli_calls += calls
+        self.tokens += tokens
+        if calls:
+            self.seconds_per_improve = elapsed
+            self.tokens_per_improve = tokens / calls
+
+    def shortfall(self, probes: int, improve_calls: int = 0) -> str | None:
+        """Name the first limit that `probes` more eval probes (after
+        improve_calls parallel improvements) would overrun, or None if they fit.
+        """
+        cost = {
+            "time_s": probes * (self.seconds_per_probe or 0.0) + ((self.seconds_per_improve or 0.0) if improve_calls else 0.0),
+            "cli_calls": probes + improve_calls,
+            "tokens": probes * (self.tokens_per_probe or 0.0) + improve_calls * (self.tokens_per_improve or 0.0),
+        }
+        used = self.used()
+        for name, limit in self.limits.items():
+            if limit is not None and used[name] + cost[name] > limit:
+                return name
+        return None
+
+    def exit_reason(self, name: str) -> str:
+        limit = self.limits[name]
+        return f"{LIMIT_NAMES[name]} ({limit:g}s)" if name == "time_s" else f"{LIMIT_NAMES[name]} ({limit})"
+
+    def summary(self) -> dict:
+        return {
+            "limits": {name: limit for name, limit in self.limits.items() if limit is not None},
+            "used": self.used(),
+        }
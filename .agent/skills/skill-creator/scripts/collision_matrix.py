@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Measure which skill each eval query actually loads when all skills compete.
+
+run_eval installs one candidate skill per probe, so it never sees one skill
+stealing another's queries — which is what costs us in production, when the
+wrong skill loads its whole SKILL.md. This installs every skill under a
+skills root side by side in each sandbox, runs the eval queries of every
+skill that has an eval set through one worker pool, and records which skill,
+if any, each run chose. One pass over N skills replaces N run_eval runs.
+
+Each distinct query is expected to load the skills whose eval sets list it as
+should-trigger, or none. The output has the per-query choices, a confusion
+matrix of runs (expected skill, or "none", by chosen skill, or "none") and
+per-skill precision and recall, plus which skills steal from which.
+"""
+
+import argparse
+import json
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from scripts.run_eval import find_project_root, latency_summary, run_single_query
+from scripts.sandbox import SandboxPool
+from scripts.stream_json import SkillChoiceDetector, sum_usage
+from scripts.utils import find_skills, parse_skill_md
+
+NONE = "none"
+
+
+def gather_queries(eval_sets: dict[str, list[dict]]) -> list[dict]:
+    """Merge the skills' eval sets into distinct queries with their expected skills."""
+    by_query: dict[str, dict] = {}
+    for skill, eval_set in eval_sets.items():
+        for item in eval_set:
+            entry = by_query.setdefault(item["query"], {"query": item["query"], "expected": [], "negative_for": []})
+            (entry["expected"] if item["should_trigger"] else entry["negative_for"]).append(skill)
+    return list(by_query.values())
+
+
+def _ratio(num: int, den: int) -> float | None:
+    return round(num / den, 3) if den else None
+
+
+def score_choices(skills: list[str], results: list[dict]) -> dict:
+    """Confusion matrix and per-skill precision/recall over individual runs.
+
+    A query expected for several skills is counted under the first of them,
+    and choosing any of them is correct.
+    """
+    labels = skills + [NONE]
+    matrix = {expected: {chosen: 0 for chosen in labels} for expected in labels}
+    for r in results:
+        row = r["expected"][0] if r["expected"] else NONE
+        for chosen, runs in r["choices"].items():
+            if chosen in matrix[row]:
+                matrix[row][chosen] += runs
+
+    per_skill = {}
+    for skill in skills:
+        chosen_runs = sum(r["choices"].get(skill, 0) for r in results)
+        correct_runs = sum(r["choices"].get(skill, 0) for r in results if skill in r["expected"])
+        expected_runs = sum(r["decided_runs"] for r in results if skill in r["expected"])
+        recalled_runs = sum(
+            sum(r["choices"].get(s, 0) for s in r["expected"]) for r in results if skill in r["expected"]
+        )
+        per_skill[skill] = {
+            "precision": _ratio(correct_runs, chosen_runs),
+            "recall": _ratio(recalled_runs, expected_runs),
+            "chosen_runs": chosen_runs,
+            "expected_runs": expected_runs,
+            # Runs of this skill's queries that loaded another skill, and vice versa
+            "stolen_by": {other: n for other, n in matrix[skill].items() if other not in (skill, NONE) and n},
+            "stole_from": {
+                row: matrix[row][skill] for row in labels if row != skill and matrix[row][skill]
+            },
+        }
+    return {"labels": labels, "matrix": matrix, "per_skill": per_skill}
+
+
+def collision_matrix(
+    skills_root: Path,
+    eval_sets_dir: Path,
+    num_workers: int,
+    timeout: int,
+    runs_per_query: int = 1,
+    model: str | None = None,
+    only: list[str] | None = None,
+    verbose: bool = False,
+) -> dict:
+    """Run every skill's eval queries against all skills installed together."""
+    # Every skill competes, whether or not it has an eval set of its own
+    commands: dict[str, tuple[str, str]] = {}
+    owner: dict[str, str] = {}
+    for skill_md in sorted(skills_root.glob("*/SKILL.md")):
+        name, description, _ = parse_skill_md(skill_md.parent)
+        clean_name = f"{name}-skill-{uuid.uuid4().hex[:8]}"
+        commands[clean_name] = (name, description)
+        owner[clean_name] = name
+    skills = sorted(owner.values())
+
+    pairs, _ = find_skills(skills_root, eval_sets_dir, only)
+    eval_sets = {
+        parse_skill_md(skill_dir)[0]: json.loads(eval_path.read_text()) for skill_dir, eval_path in pairs
+    }
+    queries = gather_queries(eval_sets)
+    if verbose:
+        print(f"{len(commands)} skills installed, {len(queries)} queries from {len(eval_sets)} eval sets, "
+              f"{runs_per_query} run(s) each", file=sys.stderr)
+
+    choices: dict[str, Counter] = {q["query"]: Counter() for q in queries}
+    probes: dict[str, list[dict]] = {q["query"]: [] for q in queries}
+    start = time.time()
+    with SandboxPool(num_workers, project_root=find_project_root()) as sandboxes:
+        sandboxes.install_set(commands)
+
+        def probe(query: str) -> dict:
+            sandbox = sandboxes.lease()
+            try:
+                return run_single_query(
+                    query, "", "", timeout, str(sandbox.root), model,
+                    detector=SkillChoiceDetector(list(commands)),
+                )
+            finally:
+                sandboxes.release(sandbox)
+
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = {
+                executor.submit(probe, q["query"]): q["query"]
+                for _ in range(runs_per_query) for q in queries
+            }
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    choices[query]["error"] += 1
+                    probes[query].append({"error": type(e).__name__, **getattr(e, "timing", {})})
+                    continue
+                chosen = owner.get(record.pop("triggered") or "", NONE)
+                record["chosen"] = chosen
+                choices[query][chosen] += 1
+                probes[query].append(record)
+
+    results = []
+    for q in queries:
+        counts = choices[q["query"]]
+        decided = {label: n for label, n in counts.items() if label != "error"}
+        top = max(decided, key=decided.get) if decided else None
+        results.append({
+            **q,
+            "choices": dict(counts),
+            "decided_runs": sum(decided.values()),
+            "chosen": top,
+            "pass": top is not None and (top in q["expected"] if q["expected"] else top == NONE),
+            "usage": sum_usage([p.get("usage") for p in probes[q["query"]]]),
+        })
+
+    scores = score_choices(skills, results)
+    all_probes = [p for q in queries for p in probes[q["query"]]]
+    return {
+        "skills": skills,
+        "results": results,
+        **scores,
+        "summary": {
+            "queries": len(results),
+            "runs": len(all_probes),
+            "errored_runs": sum(counts["error"] for counts in choices.values()),
+            "passed": sum(1 for r in results if r["pass"]),
+            "wall_s": round(time.time() - start, 2),
+            "latency": latency_summary(all_probes),
+            "usage": sum_usage([r["usage"] for r in results]),
+        },
+    }
+
+
+def format_matrix(output: dict) -> str:
+    """Render the confusion matrix as a text table (rows expected, columns chosen)."""
+    labels = output["labels"]
+    width = max(len(label) for label in labels) + 2
+    lines = ["expected \\ chosen".ljust(width) + "".join(label[:10].rjust(12) for label in labels)]
+    for row in labels:
+        if not any(output["matrix"][row].values()):
+            continue
+        lines.append(row.ljust(width) + "".join(str(output["matrix"][row][col]).rjust(12) for col in labels))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure trigger collisions between all skills under a skills root")
+    parser.add_argument("--skills-root", required=True, help="Directory whose subdirectories are skills (each with SKILL.md)")
+    parser.add_argument("--eval-sets", required=True, help="Directory of trigger eval sets named <skill-dir-name>.json")
+    parser.add_argument("--skills", nargs="*", default=None, help="Only run the eval sets of these skills (all are installed)")
+    parser.add_argument("--num-workers", type=int, default=10, help="Number of parallel workers")
+    parser.add_argument("--timeout", type=int, default=30, help="Timeout per query in seconds")
+    parser.add_argument("--runs-per-query", type=int, default=1, help="Number of runs per query")
+    parser.add_argument("--model", default=None, help="Model to use for claude -p (default: user's configured model)")
+    parser.add_argument("--output", default=None, help="Also write the JSON output to this file")
+    parser.add_argument("--verbose", action="store_true", help="Print the matrix and per-skill scores to stderr")
+    args = parser.parse_args()
+
+    output = collision_matrix(
+        skills_root=Path(args.skills_root),
+        eval_sets_dir=Path(args.eval_sets),
+        num_workers=args.num_workers,
+        timeout=args.timeout,
+        runs_per_query=args.runs_per_query,
+        model=args.model,
+        only=args.skills,
+        verbose=args.verbose,
+    )
+
+    if args.verbose:
+        summary = output["summary"]
+        print(f"Results: {summary['passed']}/{summary['queries']} queries chose the expected skill "
+              f"({summary['runs']} runs, {summary['errored_runs']} errored, {summary['wall_s']}s)", file=sys.stderr)
+        print(format_matrix(output), file=sys.stderr)
+        for skill, s in output["per_skill"].items():
+            if not s["chosen_runs"] and not s["expected_runs"]:
+                continue
+            stolen = ", ".join(f"{other} x{n}" for other, n in s["stolen_by"].items())
+            print(f"  {skill}: precision={s['precision']} recall={s['recall']}"
+                  + (f", lost to {stolen}" if stolen else ""), file=sys.stderr)
+
+    json_output = json.dumps(output, indent=2)
+    print(json_output)
+    if args.output:
+        Path(args.output).write_text(json_output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Adaptive concurrency control for run_eval.
+
+A fixed --num-workers is a guess: too high and `claude -p` throttles or times
+out, too low and the machine idles. AIMDController treats the number of
+in-flight probes like a TCP congestion window — it grows additively while
+probe latency stays near its baseline, and is cut multiplicatively on
+timeouts, failed probes or latency spikes.
+
+Queries differ in how long they inherently take, so when a probe's expected
+time is known (LatencyHints) its latency is judged as a ratio to that, against
+a baseline of such ratios; a slow query is only a spike if it is slower than
+usual for itself. Probes without an expectation fall back to a baseline in
+seconds.
+
+The controller also counts the probes in flight, so one controller shared by
+concurrent run_eval calls caps their total, not each call's.
+"""
+
+import threading
+import time
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease limit on in-flight probes."""
+
+    def __init__(
+        self,
+        max_limit: int,
+        initial: int | None = None,
+        min_limit: int = 1,
+        decrease_factor: float = 0.5,
+        spike_ratio: float = 2.0,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease_factor = decrease_factor
+        self.spike_ratio = spike_ratio
+        self._limit = float(initial if initial is not None else min(4, max_limit))
+        self._limit = min(max(self._limit, min_limit), max_limit)
+        # Slow-moving latency estimate of an uncongested probe, in seconds
+        # and as a ratio to the probe's expected time
+        self.baseline: float | None = None
+        self.ratio_baseline: float | None = None
+        self._t0 = time.monotonic()
+        self._last_decrease = float("-inf")
+        self.trajectory: list[list[float]] = [[0.0, self.limit]]
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= self.limit
+
+    def try_acquire(self) -> bool:
+        """Claim a slot for one probe if fewer than limit are in flight."""
+        with self._lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        """Give back a slot taken by try_acquire()."""
+        with self._lock:
+            self.in_flight -= 1
+
+    def _record(self, previous: int) -> None:
+        if self.limit != previous:
+            self.trajectory.append([round(time.monotonic() - self._t0, 2), self.limit])
+
+    def _decrease(self, latency: float) -> None:
+        # One cut per congestion event: probes that were already in flight
+        # when we last backed off don't count again.
+        now = time.monotonic()
+        if now - latency < self._last_decrease:
+            return
+        previous = self.limit
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        self._last_decrease = now
+        self._record(previous)
+
+    def on_success(self, latency: float, expected: float | None = None) -> None:
+        """Record a probe that finished normally after `latency` seconds.
+
+        expected is that query's usual probe time, if known.
+        """
+        with self._lock:
+            self._on_success(latency, expected)
+
+    def _on_success(self, latency: float, expected: float | None) -> None:
+        if expected:
+            value = latency / expected
+            if self.ratio_baseline is None:
+                self.ratio_baseline = value
+            baseline = self.ratio_baseline
+        else:
+            value = latency
+            if self.baseline is None:
+                self.baseline = value
+            baseline = self.baseline
+        if value > self.spike_ratio * baseline:
+            self._decrease(latency)
+            return
+        if expected:
+            self.ratio_baseline = 0.9 * baseline + 0.1 * value
+        else:
+            self.baseline = 0.9 * baseline + 0.1 * value
+        previous = self.limit
+        # +1 per full window of successes, as in TCP congestion avoidance
+        self._limit = min(self.max_limit, self._limit + 1 / max(self._limit, 1))
+        self._record(previous)
+
+    def on_failure(self, latency: float) -> None:
+        """Record a probe that timed out, exited non-zero or raised after `latency` seconds."""
+        with self._lock:
+            self._decrease(latency)
+
+    def summary(self, since: int = 0) -> dict:
+        """Return the limit trajectory (from entry `since`) for JSON output."""
+        return {
+            "mode": "aimd",
+            "max_limit": self.max_limit,
+            "final_limit": self.limit,
+            "baseline_latency": round(self.baseline, 2) if self.baseline is not None else None,
+            "baseline_ratio": round(self.ratio_baseline, 2) if self.ratio_baseline is not None else None,
+            "trajectory": self.trajectory[since:],
+        }
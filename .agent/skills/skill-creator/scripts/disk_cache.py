@@ -0,0 +1,86 @@
+"""Content-addressed JSON store shared by the on-disk caches.
+
+TriggerCache and ResponseCache both keep one small JSON file per entry,
+at <cache_dir>/<first 2 hex chars>/<sha256 key>.json, written atomically and
+evicted by age, then oldest first once the directory is over its size cap.
+DiskCache holds that layout and eviction so the two can't drift apart;
+subclasses only decide what goes into the key and the entry.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+
+def sha256_hex(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """One JSON file per key under cache_dir, with size/age eviction."""
+
+    def __init__(self, cache_dir: Path, max_bytes: int, max_age: float):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.prune()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> dict | None:
+        """Return the stored entry, or None on a miss or expired entry."""
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                return None
+            return json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write(self, key: str, entry: dict) -> None:
+        """Store one entry, stamped with its creation time, replacing the file atomically."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({**entry, "created": time.time()}))
+        os.replace(tmp_path, path)
+
+    def prune(self) -> int:
+        """Drop expired entries, then the oldest ones until under max_bytes.
+
+        Returns the number of entries removed.
+        """
+        return prune_cache_dir(self.cache_dir, self.max_bytes, self.max_age)
+
+
+def prune_cache_dir(cache_dir: Path, max_bytes: int, max_age: float) -> int:
+    """Evict from a DiskCache directory; see DiskCache.prune."""
+    now = time.time()
+    entries = []
+    removed = 0
+    for path in cache_dir.glob("*/*.json"):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        if now - st.st_mtime > max_age:
+            path.unlink(missing_ok=True)
+            removed += 1
+        else:
+            entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    if total > max_bytes:
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+    return removed
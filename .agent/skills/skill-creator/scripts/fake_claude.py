@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""Local stand-in for the `claude` CLI, for offline benchmarks of the eval harness.
+
+Understands the subset of `claude -p` that run_eval.py and
+improve_description.py use and answers without any model call:
+
+- `--output-format stream-json` emits a realistic event sequence (system init,
+  stream_event message_start / content_block_start / deltas / stops,
+  assistant, result with usage and cost). Whether the reply calls the Skill
+  tool on the installed command is drawn from a per-query trigger probability.
+  With several commands installed (collision_matrix.py), it calls the one
+  whose skill name appears in the query, or a random one if none does.
+- The improver (prompt on stdin) gets a <new_description> block followed by
+  some trailing commentary, as plain text or, with `--output-format
+  stream-json`, as streamed text deltas.
+- `--input-format stream-json` keeps one session open: startup is paid once,
+  then each user message on stdin is answered as above, a control_request
+  interrupt cuts the turn's tail short, and "/clear" starts a new session id.
+
+Behaviour is configured by a JSON file named in FAKE_CLAUDE_CONFIG:
+
+    {
+      "startup": {"dist": "lognormal", "median": 0.3, "sigma": 0.4},
+      "decision": {"dist": "uniform", "low": 0.1, "high": 0.6},
+      "tail": {"dist": "fixed", "value": 2.0},
+      "trigger_probability": {"default": 0.1, "queries": {"<query>": 0.9}},
+      "failure": {"exit_rate": 0.01, "hang_rate": 0.005, "garbage_rate": 0.01},
+      "improver": {"chars_per_s": 400, "trailing_chars": 0, "long_rate": 0.0},
+      "seed": null
+    }
+
+startup is the delay before the first event, decision the delay before the
+tool call (or text reply) starts streaming, and tail how long the process
+keeps running afterwards, as a real CLI would while executing the tool.
+Distributions are "fixed", "uniform", "exponential" or "lognormal".
+"improver" sets how fast improver replies are generated, how much text
+follows the closing </new_description> tag, and how often the description
+runs past 1024 characters (the shortening rewrite always comes back short).
+"decision" may also map specific queries to their own spec under "queries",
+to model prompts that are consistently slow to decide.
+
+If FAKE_CLAUDE_LOG names a file, one JSON line per invocation is appended
+with the query, pid, start time, decision time and outcome.
+"""
+
+import json
+import math
+import os
+import random
+import select
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_CONFIG = {
+    "startup": {"dist": "lognormal", "median": 0.3, "sigma": 0.4},
+    "decision": {"dist": "uniform", "low": 0.1, "high": 0.6},
+    "tail": {"dist": "fixed", "value": 2.0},
+    "trigger_probability": {"default": 0.5, "queries": {}},
+    "failure": {"exit_rate": 0.0, "hang_rate": 0.0, "garbage_rate": 0.0},
+    "improver": {"chars_per_s": 400, "trailing_chars": 0, "long_rate": 0.0},
+    "seed": None,
+}
+
+
+def load_config() -> dict:
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    path = os.environ.get("FAKE_CLAUDE_CONFIG")
+    if path:
+        for key, value in json.loads(Path(path).read_text()).items():
+            if isinstance(value, dict) and isinstance(config.get(key), dict):
+                config[key].update(value)
+            else:
+                config[key] = value
+    return config
+
+
+def sample(spec: dict, rng: random.Random) -> float:
+    """Draw a delay in seconds from a distribution spec."""
+    dist = spec.get("dist", "fixed")
+    if dist == "fixed":
+        return float(spec.get("value", 0.0))
+    if dist == "uniform":
+        return rng.uniform(spec["low"], spec["high"])
+    if dist == "exponential":
+        return rng.expovariate(1.0 / spec["mean"])
+    if dist == "lognormal":
+        return rng.lognormvariate(math.log(spec["median"]), spec.get("sigma", 0.5))
+    raise ValueError(f"Unknown distribution: {dist}")
+
+
+def parse_args(argv: list[str]) -> dict:
+    args = {"prompt": None, "output_format": "text", "input_format": "text", "model": None}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "-p" and i + 1 < len(argv) and not argv[i + 1].startswith("--"):
+            args["prompt"] = argv[i + 1]
+            i += 1
+        elif arg == "--output-format":
+            args["output_format"] = argv[i + 1]
+            i += 1
+        elif arg == "--input-format":
+            args["input_format"] = argv[i + 1]
+            i += 1
+        elif arg == "--model":
+            args["model"] = argv[i + 1]
+            i += 1
+        i += 1
+    return args
+
+
+def emit(event: dict) -> None:
+    sys.stdout.write(json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+
+def stream_event(event: dict) -> None:
+    emit({"type": "stream_event", "event": event})
+
+
+def command_name(query: str, rng: random.Random) -> str | None:
+    """Name of the command in the cwd's .claude/commands to call, if any."""
+    commands = [p.stem for p in sorted(Path(".claude/commands").glob("*.md"))]
+    if len(commands) <= 1:
+        return commands[0] if commands else None
+    named = [c for c in commands if c.split("-skill-")[0] in query]
+    return named[0] if named else rng.choice(commands)
+
+
+def chunks(text: str, size: int) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def respond_stream_json(
+    query: str,
+    model: str | None,
+    config: dict,
+    rng: random.Random,
+    log: dict,
+    session_id: str | None = None,
+    wait=time.sleep,
+) -> None:
+    name = command_name(query, rng)
+    probs = config["trigger_probability"]
+    p_trigger = probs.get("queries", {}).get(query, probs.get("default", 0.5))
+    triggered = name is not None and rng.random() < p_trigger
+    input_tokens = 4000 + len(query) // 4
+    model = model or "fake-model"
+
+    emit({"type": "system", "subtype": "init", "model": model, "session_id": session_id or f"fake-{os.getpid()}"})
+    stream_event({"type": "message_start", "message": {
+        "model": model, "usage": {
+            "input_tokens": 4, "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": input_tokens, "output_tokens": 1}}})
+    decision = config["decision"].get("queries", {}).get(query, config["decision"])
+    time.sleep(sample(decision, rng))
+    # Log before streaming the decision: the harness may kill us mid-stream
+    log["decided"] = time.time()
+    log["triggered"] = triggered
+    write_log(log)
+
+    if triggered:
+        tool_input = json.dumps({"skill": name})
+        content = [{"type": "tool_use", "id": "toolu_fake", "name": "Skill", "input": {"skill": name}}]
+        stream_event({"type": "content_block_start", "index": 0, "content_block": {
+            "type": "tool_use", "id": "toolu_fake", "name": "Skill", "input": {}}})
+        for piece in chunks(tool_input, 7):
+            stream_event({"type": "content_block_delta", "index": 0, "delta": {
+                "type": "input_json_delta", "partial_json": piece}})
+        output_tokens = 20
+    else:
+        text = "I can help with that directly. " * 3
+        content = [{"type": "text", "text": text}]
+        stream_event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+        for piece in chunks(text, 12):
+            stream_event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}})
+        output_tokens = len(text) // 4
+
+    stream_event({"type": "content_block_stop", "index": 0})
+    stream_event({"type": "message_delta", "delta": {"stop_reason": "tool_use" if triggered else "end_turn"},
+                  "usage": {"output_tokens": output_tokens}})
+    stream_event({"type": "message_stop"})
+    emit({"type": "assistant", "message": {"model": model, "role": "assistant", "content": content}})
+    # A real CLI would now run the tool and keep generating
+    interrupted = wait(sample(config["tail"], rng))
+    usage = {
+        "input_tokens": 4, "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": input_tokens, "output_tokens": output_tokens,
+    }
+    emit({
+        "type": "result", "subtype": "error_during_execution" if interrupted else "success", "is_error": False,
+        "duration_ms": int((time.time() - log["start"]) * 1000),
+        "num_turns": 1, "result": "" if triggered else content[0]["text"],
+        "total_cost_usd": round(input_tokens * 0.3e-6 + output_tokens * 15e-6, 6),
+        "usage": usage,
+    })
+
+
+def improver_reply(prompt: str, config: dict, rng: random.Random) -> str:
+    variant = rng.randint(1000, 9999)
+    description = f"Use this skill for tasks like the ones described (variant {variant})."
+    improver = config["improver"]
+    if "over the 1024-character hard limit" not in prompt and rng.random() < improver["long_rate"]:
+        description += " It also covers closely related follow-up requests." * 25
+    trailing = ("\n\nThis version generalizes from the failures to broader user intents. " * 40)[:improver["trailing_chars"]]
+    return f"<new_description>{description}</new_description>{trailing}\n"
+
+
+def respond_text(prompt: str, config: dict, rng: random.Random, log: dict) -> None:
+    time.sleep(sample({"dist": "uniform", "low": 0.2, "high": 0.8}, rng))
+    reply = improver_reply(prompt, config, rng)
+    # Text output only appears once the whole reply is generated
+    time.sleep(len(reply) / config["improver"]["chars_per_s"])
+    sys.stdout.write(reply)
+    log["decided"] = time.time()
+    write_log(log)
+
+
+def respond_improver_stream(prompt: str, model: str | None, config: dict, rng: random.Random, log: dict) -> None:
+    model = model or "fake-model"
+    input_tokens = len(prompt) // 4
+    emit({"type": "system", "subtype": "init", "model": model, "session_id": f"fake-{os.getpid()}"})
+    stream_event({"type": "message_start", "message": {
+        "model": model, "usage": {
+            "input_tokens": input_tokens, "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0, "output_tokens": 1}}})
+    time.sleep(sample({"dist": "uniform", "low": 0.2, "high": 0.8}, rng))
+    log["decided"] = time.time()
+    write_log(log)
+    reply = improver_reply(prompt, config, rng)
+    stream_event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+    for piece in chunks(reply, 40):
+        time.sleep(len(piece) / config["improver"]["chars_per_s"])
+        stream_event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}})
+    output_tokens = len(reply) // 4
+    stream_event({"type": "content_block_stop", "index": 0})
+    stream_event({"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": output_tokens}})
+    stream_event({"type": "message_stop"})
+    emit({"type": "assistant", "message": {"model": model, "role": "assistant", "content": [{"type": "text", "text": reply}]}})
+    emit({
+        "type": "result", "subtype": "success", "is_error": False,
+        "duration_ms": int((time.time() - log["start"]) * 1000), "num_turns": 1, "result": reply,
+        "total_cost_usd": round(input_tokens * 3e-6 + output_tokens * 15e-6, 6),
+        "usage": {"input_tokens": input_tokens, "cache_creation_input_tokens": 0,
+                  "cache_read_input_tokens": 0, "output_tokens": output_tokens},
+    })
+
+
+class StdinLines:
+    """Unbuffered line reader over stdin, so select() sees pending input."""
+
+    def __init__(self):
+        self.buffer = b""
+
+    def read(self, timeout: float | None = None) -> str | None:
+        """Return the next line, "" at EOF, or None if none arrives within timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self.buffer:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not select.select([0], [], [], remaining)[0]:
+                return None
+            chunk = os.read(0, 65536)
+            if not chunk:
+                line, self.buffer = self.buffer, b""
+                return line.decode("utf-8", errors="replace")
+            self.buffer += chunk
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return line.decode("utf-8", errors="replace") + "\n"
+
+
+def run_session(args: dict, config: dict, rng: random.Random, start: float) -> None:
+    """Answer user messages from stdin until EOF, like `--input-format stream-json`."""
+    stdin = StdinLines()
+    session = 0
+
+    def interruptible(seconds: float) -> bool:
+        # Sleep through the tail unless an interrupt arrives first
+        deadline = time.monotonic() + seconds
+        while (remaining := deadline - time.monotonic()) > 0:
+            line = stdin.read(remaining)
+            if line is None:
+                return False
+            if not line:
+                return True
+            message = json.loads(line) if line.strip() else {}
+            if message.get("type") == "control_request":
+                emit({"type": "control_response", "response": {
+                    "subtype": "success", "request_id": message.get("request_id")}})
+                if message.get("request", {}).get("subtype") == "interrupt":
+                    return True
+        return False
+
+    while line := stdin.read():
+        if not line.strip():
+            continue
+        message = json.loads(line)
+        if message.get("type") == "control_request":
+            emit({"type": "control_response", "response": {
+                "subtype": "success", "request_id": message.get("request_id")}})
+            continue
+        content = message.get("message", {}).get("content", "")
+        if isinstance(content, list):
+            content = "".join(block.get("text", "") for block in content if isinstance(block, dict))
+        if content.strip() == "/clear":
+            session += 1
+            emit({"type": "system", "subtype": "init", "model": args["model"] or "fake-model",
+                  "session_id": f"fake-{os.getpid()}-{session}"})
+            emit({"type": "result", "subtype": "success", "is_error": False, "duration_ms": 0,
+                  "num_turns": 0, "result": "", "total_cost_usd": 0.0, "usage": {}})
+            continue
+        log = {"query": content[:200], "pid": os.getpid(), "start": time.time(),
+               "format": "stream-json", "session": session, "process_start": start}
+        respond_stream_json(content, args["model"], config, rng, log,
+                            session_id=f"fake-{os.getpid()}-{session}", wait=interruptible)
+
+
+def write_log(entry: dict) -> None:
+    path = os.environ.get("FAKE_CLAUDE_LOG")
+    if path:
+        with open(path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def main():
+    start = time.time()
+    config = load_config()
+    rng = random.Random(config["seed"]) if config["seed"] is not None else random.Random()
+    args = parse_args(sys.argv[1:])
+    if args["input_format"] == "stream-json":
+        time.sleep(sample(config["startup"], rng))
+        run_session(args, config, rng, start)
+        return
+    prompt = args["prompt"] if args["prompt"] is not None else sys.stdin.read()
+    log = {"query": prompt[:200], "pid": os.getpid(), "start": start, "format": args["output_format"]}
+
+    time.sleep(sample(config["startup"], rng))
+    failure = config["failure"]
+    roll = rng.random()
+    if roll < failure.get("exit_rate", 0.0):
+        log["outcome"] = "exit"
+        write_log(log)
+        sys.stderr.write("fake claude: injected failure\n")
+        sys.exit(1)
+    roll -= failure.get("exit_rate", 0.0)
+    if roll < failure.get("hang_rate", 0.0):
+        log["outcome"] = "hang"
+        write_log(log)
+        time.sleep(3600)
+    roll -= failure.get("hang_rate", 0.0)
+    if roll < failure.get("garbage_rate", 0.0):
+        sys.stdout.write("{not json\n")
+        sys.stdout.flush()
+
+    if args["output_format"] == "stream-json" and args["prompt"] is None:
+        respond_improver_stream(prompt, args["model"], config, rng, log)
+    elif args["output_format"] == "stream-json":
+        respond_stream_json(prompt, args["model"], config, rng, log)
+    else:
+        respond_text(prompt, config, rng, log)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
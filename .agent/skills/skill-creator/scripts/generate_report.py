@@ -163,6 +163,12 @@ def generate_html(data: dict, auto_refresh: bool = False, skill_name: str = "")
         <p><strong>Iterations:</strong> {data.get('iterations_run', 0)} | <strong>Train:</strong> {data.get('train_size', '?')} | <strong>Test:</strong> {data.get('test_size', '?')}</p>
     </div>
 """)
+    pipeline = data.get("pipeline")
+    if pipeline:
+        html_parts.append(f"""    <div class="summary">
+        <p><strong>Pipelining:</strong> {pipeline['wall_s']:.0f}s over improved iterations, vs {pipeline['sequential_wall_s']:.0f}s had each improvement waited for the test set</p>
+    </div>
+""")
 
     # Legend
     html_parts.append("""
@@ -184,6 +190,7 @@ def generate_html(data: dict, auto_refresh: bool = False, skill_name: str = "")
                 <th>Iter</th>
                 <th>Train</th>
                 <th>Test</th>
+                <th>Time</th>
                 <th class="query-col">Description</th>
 """)
 
@@ -202,15 +209,18 @@ def generate_html(data: dict, auto_refresh: bool = False, skill_name: str = "")
         <tbody>
 """)
 
-    # Find best iteration for highlighting
-    if test_queries:
-        best_iter = max(history, key=lambda h: h.get("test_passed") or 0).get("iteration")
+    # Highlight the entry run_loop picked (beam search has several rows per
+    # iteration); older results without best_index fall back to the best test score
+    if data.get("best_index") is not None:
+        best_entry = history[data["best_index"]]
+    elif test_queries:
+        best_entry = max(history, key=lambda h: h.get("test_passed") or 0)
     else:
-        best_iter = max(history, key=lambda h: h.get("train_passed", h.get("passed", 0))).get("iteration")
+        best_entry = max(history, key=lambda h: h.get("train_passed", h.get("passed", 0)))
 
     # Add rows for each iteration
     for h in history:
-        iteration = h.get("iteration", "?")
+        iteration = h.get("candidate", h.get("iteration", "?"))
         train_passed = h.get("train_passed", h.get("passed", 0))
         train_total = h.get("train_total", h.get("total", 0))
         test_passed = h.get("test_passed")
@@ -253,12 +263,17 @@ def generate_html(data: dict, auto_refresh: bool = False, skill_name: str = "")
         train_class = score_class(train_correct, train_runs)
         test_class = score_class(test_correct, test_runs)
 
-        row_class = "best-row" if iteration == best_iter else ""
+        row_class = "best-row" if h is best_entry else ""
+
+        wall_time = f"{h['iteration_wall_s']:.0f}s" if h.get("iteration_wall_s") is not None else ""
+        if h.get("sequential_wall_s") is not None:
+            wall_time += f'<span class="rate">{h["sequential_wall_s"]:.0f}s unpipelined</span>'
 
         html_parts.append(f"""            <tr class="{row_class}">
                 <td>{iteration}</td>
                 <td><span class="score {train_class}">{train_correct}/{train_runs}</span></td>
                 <td><span class="score {test_class}">{test_correct}/{test_runs}</span></td>
+                <td>{wall_time}</td>
                 <td class="description">{html.escape(description)}</td>
 """)
 
@@ -301,6 +316,67 @@ def generate_html(data: dict, auto_refresh: bool = False, skill_name: str = "")
     return "".join(html_parts)
 
 
+def generate_batch_html(summary: dict) -> str:
+    """Generate the combined HTML report for a run_batch.py summary.
+
+    One row per skill with its scores and exit reason, linking to that
+    skill's own report (written by run_batch.py beside it).
+    """
+    rows = []
+    for name, s in summary["skills"].items():
+        if "error" in s:
+            rows.append(
+                f'            <tr><td>{html.escape(name)}</td><td colspan="5" class="fail">{html.escape(s["error"])}</td></tr>\n'
+            )
+            continue
+        link = f'<a href="{html.escape(name)}/report.html">{html.escape(name)}</a>'
+        rows.append(
+            f"            <tr><td>{link}</td>"
+            f"<td>{html.escape(s.get('original_score') or '?')}</td>"
+            f"<td class=\"best\">{html.escape(s.get('best_score') or '?')}</td>"
+            f"<td>{s.get('iterations_run', 0)}</td>"
+            f"<td>{html.escape(s.get('exit_reason', ''))}</td>"
+            f"<td class=\"description\">{html.escape(s.get('best_description', ''))}</td></tr>\n"
+        )
+    usage = summary.get("usage") or {}
+    return """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Skill Description Optimization — Batch</title>
+    <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@500;600&family=Lora:wght@400;500&display=swap" rel="stylesheet">
+    <style>
+        body { font-family: 'Lora', Georgia, serif; margin: 0 auto; padding: 20px; background: #faf9f5; color: #141413; }
+        h1 { font-family: 'Poppins', sans-serif; }
+        .summary { background: white; padding: 15px; border-radius: 6px; margin-bottom: 20px; border: 1px solid #e8e6dc; }
+        .summary p { margin: 5px 0; }
+        table { border-collapse: collapse; background: white; border: 1px solid #e8e6dc; font-size: 12px; width: 100%; }
+        th, td { padding: 8px; text-align: left; border: 1px solid #e8e6dc; }
+        th { font-family: 'Poppins', sans-serif; background: #141413; color: #faf9f5; font-weight: 500; }
+        td.description { font-family: monospace; font-size: 11px; max-width: 500px; }
+        .best { color: #788c5d; font-weight: bold; }
+        .fail { color: #c44; }
+        a { color: #6a9bcc; }
+    </style>
+</head>
+<body>
+    <h1>Skill Description Optimization — Batch</h1>
+    <div class="summary">
+        <p><strong>Skills:</strong> """ + str(len(summary["skills"])) + """ | <strong>Workers:</strong> """ + str(summary.get("num_workers", "?")) + """ | <strong>Wall time:</strong> """ + f"{summary.get('wall_s', 0):.0f}s" + """</p>
+        <p><strong>Eval cost:</strong> """ + f"${usage.get('cost_usd', 0):.4f} over {usage.get('probes', 0)} probes" + """</p>
+    </div>
+    <table>
+        <thead>
+            <tr><th>Skill</th><th>Original</th><th>Best</th><th>Iterations</th><th>Exit reason</th><th>Best description</th></tr>
+        </thead>
+        <tbody>
+""" + "".join(rows) + """        </tbody>
+    </table>
+</body>
+</html>
+"""
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate HTML report from run_loop output")
     parser.add_argument("input", help="Path to JSON output from run_loop.py (or - for stdin)")
@@ -0,0 +1,186 @@
+"""Bounded summaries of past attempts for the improve_description prompt.
+
+Pasting every previous attempt with every train result line makes the prompt
+grow as iterations x queries. Once that would pass a token budget,
+compact_history() renders a summary that fits instead, while run_loop keeps
+the full record on disk:
+
+- per-query outcomes across all attempts, collapsed into queries that always
+  pass, flip between attempts, or always fail
+- the most recent attempts in full, with their results
+- older attempts as their score plus a word diff against the current
+  description
+
+When that is still over budget, fewer attempts are shown in full, then the
+oldest compacted ones are dropped, then the query groups are truncated.
+"""
+
+import difflib
+
+# Rough token estimate for English prose and JSON-ish text
+CHARS_PER_TOKEN = 4
+
+DEFAULT_HISTORY_TOKEN_BUDGET = 3000
+
+# Unchanged runs longer than this many words are elided in description diffs
+DIFF_CONTEXT_WORDS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _score(h: dict) -> str:
+    train_s = f"{h.get('train_passed', h.get('passed', 0))}/{h.get('train_total', h.get('total', 0))}"
+    test_s = f"{h.get('test_passed', '?')}/{h.get('test_total', '?')}" if h.get("test_passed") is not None else None
+    return f"train={train_s}" + (f", test={test_s}" if test_s else "")
+
+
+def description_diff(old: str, new: str) -> str:
+    """Word diff from new to old: [-words only in new-] {+words only in old+}.
+
+    Long unchanged stretches are elided, so the diff of two similar
+    descriptions is much shorter than either.
+    """
+    a, b = new.split(), old.split()
+    parts = []
+    for op, i1, i2, j1, j2 in difflib.SequenceMatcher(a=a, b=b, autojunk=False).get_opcodes():
+        if op == "equal":
+            words = a[i1:i2]
+            if len(words) > 2 * DIFF_CONTEXT_WORDS:
+                words = words[:DIFF_CONTEXT_WORDS] + ["…"] + words[-DIFF_CONTEXT_WORDS:]
+            parts.append(" ".join(words))
+            continue
+        if i2 > i1:
+            parts.append("[-" + " ".join(a[i1:i2]) + "-]")
+        if j2 > j1:
+            parts.append("{+" + " ".join(b[j1:j2]) + "+}")
+    return " ".join(parts)
+
+
+def render_full(h: dict) -> str:
+    text = f"<attempt {_score(h)}>\n"
+    text += f'Description: "{h["description"]}"\n'
+    if "results" in h:
+        text += "Train results:\n"
+        for r in h["results"]:
+            status = "PASS" if r["pass"] else "FAIL"
+            text += f'  [{status}] "{r["query"][:80]}" (triggered {r["triggers"]}/{r["runs"]})\n'
+    if h.get("note"):
+        text += f'Note: {h["note"]}\n'
+    return text + "</attempt>\n\n"
+
+
+def render_compact(h: dict, current_description: str) -> str:
+    diff = description_diff(h["description"], current_description)
+    if len(diff) < len(h["description"]):
+        body = f"Diff from the current description: {diff}\n"
+    else:
+        body = f'Description: "{h["description"]}"\n'
+    return f"<attempt {_score(h)}>\n{body}</attempt>\n\n"
+
+
+def query_groups(history: list[dict]) -> dict[str, list[dict]]:
+    """Classify each query by its outcomes over all attempts that ran it."""
+    outcomes: dict[str, dict] = {}
+    for h in history:
+        for r in h.get("results", []):
+            entry = outcomes.setdefault(r["query"], {"query": r["query"], "should_trigger": r["should_trigger"], "passes": []})
+            entry["passes"].append(r["pass"])
+    groups: dict[str, list[dict]] = {"always_fails": [], "flips": [], "always_passes": []}
+    for entry in outcomes.values():
+        if all(entry["passes"]):
+            groups["always_passes"].append(entry)
+        elif any(entry["passes"]):
+            groups["flips"].append(entry)
+        else:
+            groups["always_fails"].append(entry)
+    return groups
+
+
+def render_groups(groups: dict[str, list[dict]], limit: int | None = None) -> str:
+    titles = {
+        "always_fails": "ALWAYS FAILED (no attempt got these right)",
+        "flips": "FLIPPED (some attempts got these right, others wrong)",
+        "always_passes": "ALWAYS PASSED (keep these working)",
+    }
+    text = "Query outcomes across all attempts:\n"
+    for key, title in titles.items():
+        entries = groups[key]
+        if not entries:
+            continue
+        text += f"{title}:\n"
+        shown = entries if limit is None else entries[:limit]
+        for e in shown:
+            expect = "should trigger" if e["should_trigger"] else "should NOT trigger"
+            detail = expect
+            if key == "flips":
+                detail += f", passed in {sum(e['passes'])}/{len(e['passes'])} attempts, latest {'PASS' if e['passes'][-1] else 'FAIL'}"
+            text += f'  - "{e["query"][:80]}" ({detail})\n'
+        if len(shown) < len(entries):
+            text += f"  ... and {len(entries) - len(shown)} more\n"
+    return text + "\n"
+
+
+def compact_history(
+    history: list[dict],
+    current_description: str,
+    token_budget: int = DEFAULT_HISTORY_TOKEN_BUDGET,
+    recent: int = 2,
+) -> tuple[str, dict]:
+    """Render past attempts within token_budget; return the text and its stats.
+
+    A history that fits the budget as is comes back unchanged, every attempt
+    in full. Stats record how many attempts were shown in full, compacted
+    and omitted, and the rendered size in (estimated) tokens.
+    """
+    text = "".join(render_full(h) for h in history)
+    if estimate_tokens(text) <= token_budget:
+        return text, {
+            "attempts": len(history), "full": len(history), "compacted": 0, "omitted": 0,
+            "tokens": estimate_tokens(text), "budget": token_budget,
+        }
+
+    groups = query_groups(history)
+    group_limit: int | None = None
+    full = min(recent, len(history))
+    omitted = 0
+
+    def render() -> str:
+        older = history[omitted:len(history) - full]
+        text = render_groups(groups, group_limit)
+        if omitted:
+            text += f"({omitted} earliest attempts omitted)\n\n"
+        compacted = "".join(render_compact(h, current_description) for h in older)
+        if "Diff from the current description" in compacted:
+            text += ("Older attempts are shown as word diffs from the current description: "
+                     "[-its words the attempt lacked-] {+the attempt's words instead+}.\n\n")
+        text += compacted
+        text += "".join(render_full(h) for h in history[len(history) - full:])
+        return text
+
+    text = render()
+    while estimate_tokens(text) > token_budget:
+        if full > 1:
+            full -= 1
+        elif omitted < len(history) - full:
+            omitted += 1
+        elif group_limit is None:
+            group_limit = 10
+        elif group_limit > 3:
+            group_limit = 3
+        elif full:
+            # Last resort: even the latest attempt goes (and is then omitted)
+            full -= 1
+        else:
+            break
+        text = render()
+
+    return text, {
+        "attempts": len(history),
+        "full": full,
+        "compacted": len(history) - full - omitted,
+        "omitted": omitted,
+        "tokens": estimate_tokens(text),
+        "budget": token_budget,
+    }
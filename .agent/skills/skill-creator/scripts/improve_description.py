@@ -4,26 +4,93 @@
 Takes eval results (from run_eval.py) and generates an improved description
 by calling `claude -p` as a subprocess (same auth pattern as run_eval.py —
 uses the session's Claude Code auth, no separate ANTHROPIC_API_KEY needed).
+
+The response is streamed and the process is killed as soon as the closing
+</new_description> tag arrives, so trailing commentary is never waited for.
+A description that runs past the hard limit is cut off mid-stream and goes
+straight to the shortening rewrite.
 """
 
 import argparse
 import json
 import os
 import re
+import select
 import subprocess
 import sys
+import tempfile
+import time
 from pathlib import Path
 
+from scripts.history_compaction import DEFAULT_HISTORY_TOKEN_BUDGET, compact_history, estimate_tokens, render_full
+from scripts.response_cache import ResponseCache
+from scripts.stream_json import NDJSONReader, UsageMeter, sum_usage
 from scripts.utils import parse_skill_md
 
+# Descriptions over this many characters are truncated by Claude Code
+MAX_DESCRIPTION_CHARS = 1024
+
+OPEN_TAG = "<new_description>"
+CLOSE_TAG = "</new_description>"
+
+# Directions for candidates generated side by side (run_loop's beam mode), so
+# parallel calls explore different styles instead of converging on one rewrite.
+CANDIDATE_APPROACHES = [
+    "Lead with the user's goals and the situations they are in, not the skill's features.",
+    "Be terse: two or three sentences, under 60 words, built around the most distinctive trigger words.",
+    "Contrast explicitly with near-miss requests this skill should NOT handle.",
+    "Organize the description around concrete kinds of tasks and the artifacts the user mentions.",
+    "Start over from scratch with a sentence structure unlike any previous attempt.",
+    "Name the adjacent phrasings and synonyms users actually type for this kind of request.",
+]
+
 
-def _call_claude(prompt: str, model: str | None, timeout: int = 300) -> str:
-    """Run `claude -p` with the prompt on stdin and return the text response.
+def _stream_text(event: dict) -> str | None:
+    """Text carried by one stream-json event: a text delta, or (as a fallback
+    when partial messages are missing) the whole assistant message or result.
+    """
+    event_type = event.get("type")
+    if event_type == "stream_event":
+        se = event.get("event", {})
+        if se.get("type") == "content_block_delta" and se.get("delta", {}).get("type") == "text_delta":
+            return se["delta"].get("text", "")
+    elif event_type == "assistant":
+        blocks = event.get("message", {}).get("content", [])
+        return "".join(b.get("text", "") for b in blocks if b.get("type") == "text")
+    elif event_type == "result" and isinstance(event.get("result"), str):
+        return event["result"]
+    return None
+
+
+def _call_claude(
+    prompt: str,
+    model: str | None,
+    timeout: int = 300,
+    cache: ResponseCache | None = None,
+    limit_chars: int | None = None,
+) -> tuple[str, dict]:
+    """Run `claude -p` with the prompt on stdin; return the text response and
+    how it ended.
 
     Prompt goes over stdin (not argv) because it embeds the full SKILL.md
     body and can easily exceed comfortable argv length.
+
+    The response is read as stream-json and the process is killed once the
+    text contains the closing </new_description> tag, or, with limit_chars,
+    once the open description is longer than that (the caller rewrites it
+    anyway, so the rest isn't worth waiting for). The returned info has
+    "stop" ("tag", "length" or "end"), "cached", "seconds" and the token
+    "usage". A non-zero exit before the closing tag raises RuntimeError,
+    whatever was streamed; only tag and length stops are cached.
     """
-    cmd = ["claude", "-p", "--output-format", "text"]
+    if cache is not None:
+        cached = cache.get(prompt, model)
+        if cached is not None:
+            # Only tag and length stops are stored, so a missing tag means length
+            stop = "tag" if CLOSE_TAG in cached else "length"
+            return cached, {"stop": stop, "cached": True, "seconds": 0.0, "usage": None}
+
+    cmd = ["claude", "-p", "--output-format", "stream-json", "--verbose", "--include-partial-messages"]
     if model:
         cmd.extend(["--model", model])
 
@@ -32,19 +99,88 @@ def _call_claude(prompt: str, model: str | None, timeout: int = 300) -> str:
     # programmatic subprocess usage is safe. Same pattern as run_eval.py.
     env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
 
-    result = subprocess.run(
-        cmd,
-        input=prompt,
-        capture_output=True,
-        text=True,
-        env=env,
-        timeout=timeout,
-    )
-    if result.returncode != 0:
-        raise RuntimeError(
-            f"claude -p exited {result.returncode}\nstderr: {result.stderr}"
+    started = time.monotonic()
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            env=env,
         )
-    return result.stdout
+        try:
+            process.stdin.write(prompt.encode("utf-8"))
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+        meter = UsageMeter()
+        reader = NDJSONReader()
+        fd = process.stdout.fileno()
+        deadline = started + timeout
+        deltas: list[str] = []
+        text = ""
+        fallback = None
+        stop = None
+        try:
+            while stop is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+
+                chunk = os.read(fd, 65536)
+                for event in reader.feed(chunk) if chunk else reader.close():
+                    meter.feed(event)
+                    piece = _stream_text(event)
+                    if piece is None:
+                        continue
+                    if event["type"] == "stream_event":
+                        deltas.append(piece)
+                    elif fallback is None:
+                        fallback = piece
+                text = "".join(deltas) if deltas else (fallback or "")
+
+                if CLOSE_TAG in text:
+                    # Nothing after the tag is used
+                    text = text[:text.index(CLOSE_TAG) + len(CLOSE_TAG)]
+                    stop = "tag"
+                elif limit_chars is not None and OPEN_TAG in text and (
+                    # Measured as _parse_description will strip it
+                    len(text[text.index(OPEN_TAG) + len(OPEN_TAG):].strip().strip('"')) > limit_chars
+                ):
+                    stop = "length"
+                elif not chunk:
+                    returncode = process.wait(timeout=max(deadline - time.monotonic(), 0.1))
+                    # A crash mid-description leaves a fragment, not a description
+                    if returncode != 0:
+                        stderr.seek(0)
+                        raise RuntimeError(
+                            f"claude -p exited {returncode}\nstderr: {stderr.read().decode('utf-8', 'replace')}"
+                        )
+                    stop = "end"
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+    if cache is not None and stop in ("tag", "length"):
+        cache.put(prompt, model, text)
+    return text, {
+        "stop": stop,
+        "cached": False,
+        "seconds": round(time.monotonic() - started, 3),
+        "usage": meter.record(),
+    }
+
+
+def _parse_description(text: str, truncated: bool = False) -> str:
+    """The description in the response's <new_description> block, or the whole
+    response if there is none. With truncated (a length stop), a block cut
+    off mid-stream is taken as is.
+    """
+    end = rf"(?:{CLOSE_TAG}|\Z)" if truncated else CLOSE_TAG
+    match = re.search(rf"{OPEN_TAG}(.*?){end}", text, re.DOTALL)
+    return match.group(1).strip().strip('"') if match else text.strip().strip('"')
 
 
 def improve_description(
@@ -57,15 +193,37 @@ def improve_description(
     test_results: dict | None = None,
     log_dir: Path | None = None,
     iteration: int | None = None,
-) -> str:
-    """Call Claude to improve the description based on eval results."""
+    approach: str | None = None,
+    candidate: int | None = None,
+    history_token_budget: int | None = DEFAULT_HISTORY_TOKEN_BUDGET,
+    response_cache: ResponseCache | None = None,
+) -> tuple[str, dict]:
+    """Call Claude to improve the description based on eval results.
+
+    Returns the new description and the summed token usage of the model
+    calls made for it (cached responses cost nothing).
+
+    approach, if given, steers this attempt in a particular direction (see
+    CANDIDATE_APPROACHES); candidate numbers the attempt within its iteration
+    so parallel calls log to separate transcripts.
+
+    Previous attempts are summarized to fit history_token_budget (see
+    history_compaction.py); None pastes every attempt in full. The
+    transcript records the prompt's estimated size and how the history was
+    compacted.
+
+    With a response_cache, a prompt seen before (same model) is answered
+    from disk; the transcript notes which responses were cached and how each
+    streamed response ended.
+    """
+    # Queries whose every run errored say nothing about the description
     failed_triggers = [
         r for r in eval_results["results"]
-        if r["should_trigger"] and not r["pass"]
+        if r["should_trigger"] and not r["pass"] and not r.get("errored")
     ]
     false_triggers = [
         r for r in eval_results["results"]
-        if not r["should_trigger"] and not r["pass"]
+        if not r["should_trigger"] and not r["pass"] and not r.get("errored")
     ]
 
     # Build scores summary
@@ -100,22 +258,14 @@ Current scores ({scores_summary}):
             prompt += f'  - "{r["query"]}" (triggered {r["triggers"]}/{r["runs"]} times)\n'
         prompt += "\n"
 
+    history_stats = None
     if history:
         prompt += "PREVIOUS ATTEMPTS (do NOT repeat these — try something structurally different):\n\n"
-        for h in history:
-            train_s = f"{h.get('train_passed', h.get('passed', 0))}/{h.get('train_total', h.get('total', 0))}"
-            test_s = f"{h.get('test_passed', '?')}/{h.get('test_total', '?')}" if h.get('test_passed') is not None else None
-            score_str = f"train={train_s}" + (f", test={test_s}" if test_s else "")
-            prompt += f'<attempt {score_str}>\n'
-            prompt += f'Description: "{h["description"]}"\n'
-            if "results" in h:
-                prompt += "Train results:\n"
-                for r in h["results"]:
-                    status = "PASS" if r["pass"] else "FAIL"
-                    prompt += f'  [{status}] "{r["query"][:80]}" (triggered {r["triggers"]}/{r["runs"]})\n'
-            if h.get("note"):
-                prompt += f'Note: {h["note"]}\n'
-            prompt += "</attempt>\n\n"
+        if history_token_budget is None:
+            prompt += "".join(render_full(h) for h in history)
+        else:
+            history_text, history_stats = compact_history(history, current_description, history_token_budget)
+            prompt += history_text
 
     prompt += f"""</scores_summary>
 
@@ -138,45 +288,64 @@ Here are some tips that we've found to work well in writing these descriptions:
 - If you're getting lots of failures after repeated attempts, change things up. Try different sentence structures or wordings.
 
 I'd encourage you to be creative and mix up the style in different iterations since you'll have multiple opportunities to try different approaches and we'll just grab the highest-scoring one at the end. 
+"""
+    if approach:
+        prompt += f"""
+For this attempt specifically: {approach}
+"""
 
+    prompt += """
 Please respond with only the new description text in <new_description> tags, nothing else."""
 
-    text = _call_claude(prompt, model)
-
-    match = re.search(r"<new_description>(.*?)</new_description>", text, re.DOTALL)
-    description = match.group(1).strip().strip('"') if match else text.strip().strip('"')
+    text, info = _call_claude(prompt, model, cache=response_cache, limit_chars=MAX_DESCRIPTION_CHARS)
+    truncated = info["stop"] == "length"
+    description = _parse_description(text, truncated=truncated)
 
     transcript: dict = {
         "iteration": iteration,
+        "candidate": candidate,
+        "approach": approach,
         "prompt": prompt,
+        "prompt_tokens": estimate_tokens(prompt),
+        "history": history_stats,
         "response": text,
+        "response_cached": info["cached"],
+        "response_stop": info["stop"],
+        "response_seconds": info["seconds"],
+        "response_usage": info["usage"],
         "parsed_description": description,
         "char_count": len(description),
-        "over_limit": len(description) > 1024,
+        "over_limit": truncated or len(description) > MAX_DESCRIPTION_CHARS,
     }
 
     # Safety net: the prompt already states the 1024-char hard limit, but if
     # the model blew past it anyway, make one fresh single-turn call that
     # quotes the too-long version and asks for a shorter rewrite. (The old
     # SDK path did this as a true multi-turn; `claude -p` is one-shot, so we
-    # inline the prior output into the new prompt instead.)
-    if len(description) > 1024:
+    # inline the prior output into the new prompt instead.) A response
+    # stopped for length is always rewritten, quoting the description as far
+    # as it got, since its text is cut off mid-sentence.
+    if truncated or len(description) > MAX_DESCRIPTION_CHARS:
+        over = "at least " if truncated else ""
         shorten_prompt = (
             f"{prompt}\n\n"
             f"---\n\n"
             f"A previous attempt produced this description, which at "
-            f"{len(description)} characters is over the 1024-character hard limit:\n\n"
+            f"{over}{len(description)} characters is over the 1024-character hard limit:\n\n"
             f'"{description}"\n\n'
             f"Rewrite it to be under 1024 characters while keeping the most "
             f"important trigger words and intent coverage. Respond with only "
             f"the new description in <new_description> tags."
         )
-        shorten_text = _call_claude(shorten_prompt, model)
-        match = re.search(r"<new_description>(.*?)</new_description>", shorten_text, re.DOTALL)
-        shortened = match.group(1).strip().strip('"') if match else shorten_text.strip().strip('"')
+        shorten_text, shorten_info = _call_claude(shorten_prompt, model, cache=response_cache)
+        shortened = _parse_description(shorten_text, truncated=shorten_info["stop"] == "length")
 
         transcript["rewrite_prompt"] = shorten_prompt
         transcript["rewrite_response"] = shorten_text
+        transcript["rewrite_response_cached"] = shorten_info["cached"]
+        transcript["rewrite_response_stop"] = shorten_info["stop"]
+        transcript["rewrite_response_seconds"] = shorten_info["seconds"]
+        transcript["rewrite_response_usage"] = shorten_info["usage"]
         transcript["rewrite_description"] = shortened
         transcript["rewrite_char_count"] = len(shortened)
         description = shortened
@@ -185,10 +354,11 @@ Please respond with only the new description text in <new_description> tags, not
 
     if log_dir:
         log_dir.mkdir(parents=True, exist_ok=True)
-        log_file = log_dir / f"improve_iter_{iteration or 'unknown'}.json"
+        suffix = f"_c{candidate}" if candidate is not None else ""
+        log_file = log_dir / f"improve_iter_{iteration or 'unknown'}{suffix}.json"
         log_file.write_text(json.dumps(transcript, indent=2))
 
-    return description
+    return description, sum_usage([transcript["response_usage"], transcript.get("rewrite_response_usage")])
 
 
 def main():
@@ -197,6 +367,12 @@ def main():
     parser.add_argument("--skill-path", required=True, help="Path to skill directory")
     parser.add_argument("--history", default=None, help="Path to history JSON (previous attempts)")
     parser.add_argument("--model", required=True, help="Model for improvement")
+    parser.add_argument("--history-token-budget", type=int, default=DEFAULT_HISTORY_TOKEN_BUDGET,
+                        help="Summarize previous attempts to about this many tokens (0 for no limit)")
+    parser.add_argument("--response-cache", default=None,
+                        help="Reuse responses to identical prompts from this cache directory (opt-in)")
+    parser.add_argument("--bypass-cache", action="store_true",
+                        help="With --response-cache, call the model anyway and overwrite the cached responses")
     parser.add_argument("--verbose", action="store_true", help="Print thinking to stderr")
     args = parser.parse_args()
 
@@ -217,13 +393,15 @@ def main():
         print(f"Current: {current_description}", file=sys.stderr)
         print(f"Score: {eval_results['summary']['passed']}/{eval_results['summary']['total']}", file=sys.stderr)
 
-    new_description = improve_description(
+    new_description, _ = improve_description(
         skill_name=name,
         skill_content=content,
         current_description=current_description,
         eval_results=eval_results,
         history=history,
         model=args.model,
+        history_token_budget=args.history_token_budget or None,
+        response_cache=ResponseCache(Path(args.response_cache), bypass=args.bypass_cache) if args.response_cache else None,
     )
 
     if args.verbose:
@@ -0,0 +1,190 @@
+"""Offline lexical pre-screening of candidate descriptions.
+
+Every candidate costs a full round of CLI probes before we learn it is
+obviously bad, say because it dropped the words the should-trigger queries
+use. LexicalScreen predicts, from BM25 term overlap alone, how well a
+description matches each eval query relative to the competing skills'
+descriptions, and turns that into a predicted pass rate, so run_loop can rank
+candidates and drop the hopeless ones before run_eval.
+
+Each description is a BM25 document over a vocabulary fitted on the eval
+queries and the competitors' descriptions; a query's match with a description
+is its BM25 score as a share of the score of the best competitor (plus a
+smoothing constant), in [0, 1). A should-trigger query predicts a pass as
+its match, a should-not-trigger query as one minus it, and the predicted
+score is the mean over queries.
+
+All descriptions are scored against all queries in one matrix product. NumPy
+is used when installed; without it the same arithmetic runs on dicts.
+"""
+
+import math
+import re
+import statistics
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from scripts.utils import parse_skill_md
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# BM25's average document length when there are no competitors to take it
+# from: about a 100-word description once stopwords are gone
+DEFAULT_AVG_TOKENS = 55
+
+# Added to the best competitor's score, so a single weak shared word
+# doesn't count as a full match when nothing competes
+MATCH_SMOOTHING = 1.0
+
+# A candidate predicted this far below its parent is not evaluated
+DEFAULT_MARGIN = 0.15
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do for from has have how i if in into is it its me my "
+    "of on or our so that the their them then there these this to us use was we what when "
+    "where which who will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased words minus stopwords, with plural and -ing/-ed endings stripped."""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        for suffix in ("ing", "ed", "es", "s"):
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+        tokens.append(word)
+    return tokens
+
+
+def pearson(xs: list[float], ys: list[float]) -> float | None:
+    """Pearson correlation, or None with fewer than 3 pairs or a constant side."""
+    if len(xs) < 3:
+        return None
+    try:
+        return round(statistics.correlation(xs, ys), 3)
+    except statistics.StatisticsError:
+        return None
+
+
+class LexicalScreen:
+    """BM25 match of descriptions against a fixed set of eval queries."""
+
+    def __init__(self, queries: list[dict], competitors: list[str] | None = None):
+        self.queries = queries
+        self.competitors = competitors or []
+        query_tokens = [tokenize(q["query"]) for q in queries]
+        competitor_tokens = [tokenize(d) for d in self.competitors]
+        self.vocab: dict[str, int] = {}
+        for tokens in query_tokens + competitor_tokens:
+            for token in tokens:
+                self.vocab.setdefault(token, len(self.vocab))
+
+        # Term rarity across the queries: words every query shares say little
+        n = len(queries)
+        df = [0] * len(self.vocab)
+        for tokens in query_tokens:
+            for token in set(tokens):
+                df[self.vocab[token]] += 1
+        self.idf = [math.log(1 + (n - f + 0.5) / (f + 0.5)) for f in df]
+        # Fixed, so scores from separate calls are comparable
+        self.avg_len = (
+            sum(len(t) for t in competitor_tokens) / len(competitor_tokens) if competitor_tokens else DEFAULT_AVG_TOKENS
+        )
+        self.query_terms = [{self.vocab[t]: tokens.count(t) for t in set(tokens)} for tokens in query_tokens]
+        self._competitor_best: list[float] | None = None
+
+    def _weights(self, descriptions: list[str]) -> list[dict[int, float]]:
+        """BM25 term weights of each description (terms outside the vocabulary score 0)."""
+        weights = []
+        for tokens in (tokenize(d) for d in descriptions):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / max(self.avg_len, 1))
+            counts: dict[int, int] = {}
+            for token in tokens:
+                if token in self.vocab:
+                    counts[self.vocab[token]] = counts.get(self.vocab[token], 0) + 1
+            weights.append({
+                v: self.idf[v] * tf * (BM25_K1 + 1) / (tf + norm) for v, tf in counts.items()
+            })
+        return weights
+
+    def _scores(self, descriptions: list[str]) -> list[list[float]]:
+        """BM25 score of every query (rows) against every description (columns)."""
+        weights = self._weights(descriptions)
+        if np is not None:
+            queries = np.zeros((len(self.query_terms), len(self.vocab)))
+            for i, terms in enumerate(self.query_terms):
+                for v, count in terms.items():
+                    queries[i, v] = count
+            docs = np.zeros((len(self.vocab), len(weights)))
+            for j, w in enumerate(weights):
+                for v, value in w.items():
+                    docs[v, j] = value
+            return (queries @ docs).tolist()
+        return [
+            [sum(count * w.get(v, 0.0) for v, count in terms.items()) for w in weights]
+            for terms in self.query_terms
+        ]
+
+    def matches(self, descriptions: list[str]) -> list[list[float]]:
+        """Per description, each query's match in [0, 1) against the competitors."""
+        if self._competitor_best is None:
+            # The competitors' side of every match is the same each call
+            rows = self._scores(self.competitors) if self.competitors else [[] for _ in self.queries]
+            self._competitor_best = [max(row, default=0.0) for row in rows]
+        rows = self._scores(descriptions)
+        return [
+            [score / (score + best + MATCH_SMOOTHING) for score, best in zip(column, self._competitor_best)]
+            for column in zip(*rows)
+        ] if self.queries else [[] for _ in descriptions]
+
+    def predict(self, descriptions: list[str]) -> list[float]:
+        """Predicted pass rate of each description on the queries."""
+        predicted = []
+        for matches in self.matches(descriptions):
+            passes = [m if q["should_trigger"] else 1 - m for m, q in zip(matches, self.queries)]
+            predicted.append(round(sum(passes) / len(passes), 4) if passes else 0.0)
+        return predicted
+
+    def query_correlation(self, description: str, results: list[dict]) -> float | None:
+        """Correlation of each query's match with its observed trigger rate."""
+        match = dict(zip((q["query"] for q in self.queries), self.matches([description])[0]))
+        pairs = [(match[r["query"]], r["triggers"] / r["runs"]) for r in results if r["query"] in match and r["runs"]]
+        return pearson([m for m, _ in pairs], [rate for _, rate in pairs])
+
+
+def competitor_descriptions(skills_root: Path, exclude: Path | None = None) -> list[str]:
+    """Descriptions of the skills under skills_root, other than exclude."""
+    descriptions = []
+    for skill_md in sorted(skills_root.glob("*/SKILL.md")):
+        if exclude is not None and skill_md.parent.resolve() == exclude.resolve():
+            continue
+        descriptions.append(parse_skill_md(skill_md.parent)[1])
+    return descriptions
+
+
+def screen_candidates(
+    screen: LexicalScreen,
+    candidates: list[str],
+    parent_scores: list[float],
+    margin: float = DEFAULT_MARGIN,
+) -> tuple[list[int], list[float]]:
+    """Rank candidates by predicted score and drop those predicted more than
+    margin below their parent's.
+
+    parent_scores[i] is the predicted score of candidate i's parent. Returns
+    the indices kept, best first (always at least the best one), and every
+    candidate's predicted score.
+    """
+    predicted = screen.predict(candidates)
+    order = sorted(range(len(candidates)), key=lambda i: predicted[i], reverse=True)
+    kept = [i for i in order if predicted[i] >= parent_scores[i] - margin]
+    return kept or order[:1], predicted
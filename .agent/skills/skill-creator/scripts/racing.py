@@ -0,0 +1,107 @@
+"""Successive-halving race between candidate descriptions.
+
+Evaluating every candidate on the whole train set wastes most of its CLI
+calls on candidates that are clearly worse after a handful of queries.
+race_candidates() scores all candidates on a small, balanced slice of the
+train set, eliminates the bottom half, and doubles the slice for the
+survivors — only the newly added queries are run, earlier results carry over
+— until `keep` candidates remain. Every rung's standings are logged.
+"""
+
+import math
+import random
+from typing import Callable
+
+
+def race_order(train_set: list[dict], seed: int = 0) -> list[dict]:
+    """Shuffle the train set so every prefix mixes should/shouldn't-trigger queries."""
+    rng = random.Random(seed)
+    positives = [item for item in train_set if item["should_trigger"]]
+    negatives = [item for item in train_set if not item["should_trigger"]]
+    rng.shuffle(positives)
+    rng.shuffle(negatives)
+    ordered = []
+    for i in range(max(len(positives), len(negatives))):
+        ordered.extend(group[i] for group in (positives, negatives) if i < len(group))
+    return ordered
+
+
+def race_score(results: list[dict]) -> tuple[float, float]:
+    """(fraction of queries passed, fraction of individual runs correct)."""
+    if not results:
+        return 0.0, 0.0
+    passed = sum(1 for r in results if r["pass"])
+    runs = sum(r["runs"] for r in results)
+    correct = sum(r["triggers"] if r["should_trigger"] else r["runs"] - r["triggers"] for r in results)
+    return passed / len(results), correct / runs if runs else 0.0
+
+
+def race_candidates(
+    descriptions: list[str],
+    train_set: list[dict],
+    evaluate_many: Callable[[list[tuple[str, list[dict]]]], list[list[dict]]],
+    keep: int = 1,
+    min_queries: int = 4,
+    runs_per_query: int = 1,
+    seed: int = 0,
+) -> dict:
+    """Race descriptions by successive halving and return the survivors.
+
+    evaluate_many takes (description, queries) pairs and returns the
+    run_eval result list for each, so callers can run a rung's evaluations
+    concurrently. The first rung uses enough queries that the slice grows to
+    the full train set by the time `keep` candidates are left (never fewer
+    than min_queries).
+
+    Returns survivors (indices into descriptions, best first), results (per
+    candidate index, every train result gathered), log (one entry per rung),
+    and runs_used vs full_runs — what evaluating every candidate on the whole
+    train set would have cost.
+    """
+    order = race_order(train_set, seed)
+    alive = list(range(len(descriptions)))
+    results: dict[int, list[dict]] = {i: [] for i in alive}
+    rungs = max(math.ceil(math.log2(len(descriptions) / max(keep, 1))), 0)
+    size = min(len(order), max(min_queries, math.ceil(len(order) / 2 ** rungs)))
+    evaluated = 0
+    log = []
+
+    while True:
+        new_queries = order[evaluated:size]
+        if new_queries:
+            batches = evaluate_many([(descriptions[i], new_queries) for i in alive])
+            for i, batch in zip(alive, batches):
+                results[i].extend(batch)
+        evaluated = size
+
+        ranked = sorted(alive, key=lambda i: race_score(results[i]), reverse=True)
+        if len(alive) <= keep:
+            survivors = ranked
+        else:
+            survivors = ranked[:max(keep, math.ceil(len(alive) / 2))]
+        log.append({
+            "rung": len(log),
+            "queries": evaluated,
+            "standings": [
+                {
+                    "candidate": i,
+                    "passed": sum(1 for r in results[i] if r["pass"]),
+                    "evaluated": len(results[i]),
+                    "score": round(race_score(results[i])[0], 3),
+                    "eliminated": i not in survivors,
+                }
+                for i in ranked
+            ],
+        })
+        alive = survivors
+        if len(alive) <= keep:
+            break
+        size = min(len(order), size * 2)
+
+    return {
+        "survivors": alive,
+        "results": results,
+        "log": log,
+        "runs_used": sum(r["runs"] for batch in results.values() for r in batch),
+        "full_runs": len(descriptions) * len(train_set) * runs_per_query,
+    }
@@ -0,0 +1,54 @@
+"""On-disk cache of improve_description model responses.
+
+A run_loop restart, or re-running improve_description with the same
+--eval-results, sends byte-identical prompts; each response is stored under
+the hash of (prompt, model) so those calls return instantly up to the first
+prompt that changed. Opt-in: a cache only helps when replaying, and a fresh
+sample is sometimes the point. Storage and eviction are the trigger cache's
+(see disk_cache.py).
+"""
+
+import json
+from pathlib import Path
+
+from scripts.disk_cache import DiskCache, sha256_hex
+
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+
+class ResponseCache(DiskCache):
+    """Content-addressed store of `claude -p` text responses with size/age eviction.
+
+    With bypass, lookups always miss but fresh responses are still stored,
+    refreshing the cache.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+        bypass: bool = False,
+    ):
+        self.bypass = bypass
+        super().__init__(cache_dir, max_bytes, max_age)
+
+    @staticmethod
+    def key(prompt: str, model: str | None) -> str:
+        return sha256_hex(json.dumps([sha256_hex(prompt), model or ""]))
+
+    def get(self, prompt: str, model: str | None) -> str | None:
+        """Return the cached response, or None on a miss, expired entry or bypass."""
+        if self.bypass:
+            return None
+        entry = self._read(self.key(prompt, model))
+        return None if entry is None else entry["response"]
+
+    def put(self, prompt: str, model: str | None, response: str) -> None:
+        """Store one response."""
+        self._write(self.key(prompt, model), {
+            "model": model,
+            "prompt_chars": len(prompt),
+            "response": response,
+        })
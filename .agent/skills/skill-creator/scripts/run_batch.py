@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Optimize the descriptions of many skills in one run.
+
+Runs run_loop for every skill under a skills root that has a trigger eval
+set, all at the same time, drawing on one SandboxPool, one probe executor
+(see run_eval.make_executor) and one TriggerCache. Each skill's loop runs in
+its own thread and its run_eval calls lease sandboxes from the shared pool
+and submit probes to the shared workers, so the skills' iterations interleave: while
+one skill waits on improve_description, the others keep the workers busy.
+
+Everything lands in one timestamped results directory: a subdirectory per
+skill (results.json, report.html, checkpoint.json, logs/), plus summary.json
+and a combined report.html linking to the per-skill reports.
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from scripts.generate_report import generate_batch_html, generate_html
+from scripts.lexical_screen import DEFAULT_MARGIN, competitor_descriptions
+from scripts.run_eval import find_project_root, make_executor
+from scripts.run_loop import run_loop
+from scripts.sandbox import SandboxPool
+from scripts.scheduling import LatencyHints
+from scripts.stream_json import sum_usage
+from scripts.trigger_cache import TriggerCache
+from scripts.utils import find_skills, parse_skill_md
+
+
+def _score(entry: dict) -> str:
+    """Headline score of one history entry: CV held-out score, else test, else train."""
+    if entry.get("cv"):
+        return f"held-out {entry['cv']['held_out']:.0%}"
+    if entry.get("test_total"):
+        return f"{entry['test_passed']}/{entry['test_total']}"
+    return f"{entry['train_passed']}/{entry['train_total']}"
+
+
+def skill_summary(output: dict, elapsed: float) -> dict:
+    history = output["history"]
+    return {
+        "exit_reason": output["exit_reason"],
+        "original_description": output["original_description"],
+        "original_score": _score(history[0]) if history else None,
+        "best_description": output["best_description"],
+        "best_score": output["best_score"],
+        "best_train_score": output["best_train_score"],
+        "best_test_score": output["best_test_score"],
+        "iterations_run": output["iterations_run"],
+        "usage": output["usage"],
+        "elapsed": round(elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the eval + improve loop for every skill under a skills root")
+    parser.add_argument("--skills-root", required=True, help="Directory whose subdirectories are skills (each with SKILL.md)")
+    parser.add_argument("--eval-sets", required=True, help="Directory of trigger eval sets named <skill-dir-name>.json")
+    parser.add_argument("--skills", nargs="*", default=None, help="Only these skills (directory names)")
+    parser.add_argument("--concurrent-skills", type=int, default=0,
+                        help="Skills optimized at the same time (default: all)")
+    parser.add_argument("--num-workers", type=int, default=10, help="Size of the shared worker pool")
+    parser.add_argument("--timeout", type=int, default=30, help="Timeout per query in seconds")
+    parser.add_argument("--max-iterations", type=int, default=5, help="Max improvement iterations per skill")
+    parser.add_argument("--runs-per-query", type=int, default=3, help="Number of runs per query")
+    parser.add_argument("--trigger-threshold", type=float, default=0.5, help="Trigger rate threshold")
+    parser.add_argument("--early-stop", choices=["bound", "sprt"], default=None,
+                        help="Stop scheduling runs for a query once its pass/fail is settled (see run_eval.py)")
+    parser.add_argument("--engine", choices=["pool", "asyncio", "warm"], default="pool",
+                        help="How run_eval drives claude -p probes (see run_eval.py)")
+    parser.add_argument("--max-retries", type=int, default=2, help="Retries for a probe that times out or errors")
+    parser.add_argument("--candidates", type=int, default=1,
+                        help="Beam search: improved descriptions to generate and evaluate in parallel per iteration")
+    parser.add_argument("--beam-width", type=int, default=1,
+                        help="Beam search: best descriptions kept as parents for the next iteration")
+    parser.add_argument("--race", action="store_true",
+                        help="Beam search: race candidates by successive halving on the train set before full evaluation")
+    parser.add_argument("--folds", type=int, default=0,
+                        help="Split into k stratified folds (k > 1) and select on the mean over the --holdout of them held out")
+    parser.add_argument("--prescreen", action="store_true",
+                        help="Skip hopeless proposals by offline lexical match, with the other skills as competitors (see run_loop.py)")
+    parser.add_argument("--prescreen-margin", type=float, default=DEFAULT_MARGIN,
+                        help="With --prescreen, skip proposals predicted this far below their parent")
+    parser.add_argument("--holdout", type=float, default=0.4, help="Fraction of eval set to hold out for testing (0 to disable)")
+    parser.add_argument("--model", required=True, help="Model for improvement")
+    parser.add_argument("--results-dir", required=True, help="Save all outputs to a timestamped subdirectory here")
+    parser.add_argument("--no-cache", action="store_true", help="Don't reuse trigger outcomes cached under --results-dir")
+    parser.add_argument("--verbose", action="store_true", help="Print progress to stderr")
+    args = parser.parse_args()
+
+    pairs, skipped = find_skills(Path(args.skills_root), Path(args.eval_sets), args.skills)
+    if not pairs:
+        print(f"Error: No skills under {args.skills_root} have an eval set in {args.eval_sets}", file=sys.stderr)
+        sys.exit(1)
+    if skipped and args.verbose:
+        print(f"Skipping (no eval set): {', '.join(skipped)}", file=sys.stderr)
+
+    results_root = Path(args.results_dir)
+    results_dir = results_root / time.strftime("%Y-%m-%d_%H%M%S")
+    results_dir.mkdir(parents=True, exist_ok=True)
+    # Shared with single-skill run_loop runs under the same --results-dir
+    cache = None if args.no_cache else TriggerCache(results_root / "trigger_cache")
+
+    def optimize(skill_dir: Path, eval_path: Path, sandboxes: SandboxPool, executor: Executor) -> tuple[dict, float]:
+        skill_results = results_dir / skill_dir.name
+        skill_results.mkdir(parents=True, exist_ok=True)
+        t0 = time.time()
+        output = run_loop(
+            eval_set=json.loads(eval_path.read_text()),
+            skill_path=skill_dir,
+            description_override=None,
+            num_workers=args.num_workers,
+            timeout=args.timeout,
+            max_iterations=args.max_iterations,
+            runs_per_query=args.runs_per_query,
+            trigger_threshold=args.trigger_threshold,
+            holdout=args.holdout,
+            model=args.model,
+            # Interleaved per-iteration output from many loops is unreadable
+            verbose=False,
+            log_dir=skill_results / "logs",
+            cache=cache,
+            early_stop=args.early_stop,
+            engine=args.engine,
+            sandboxes=sandboxes,
+            max_retries=args.max_retries,
+            latency_hints=LatencyHints(results_root / "latency_hints" / f"{skill_dir.name}.json"),
+            candidates=args.candidates,
+            beam_width=args.beam_width,
+            race=args.race,
+            folds=args.folds,
+            checkpoint_path=skill_results / "checkpoint.json",
+            prescreen=args.prescreen,
+            competitors=competitor_descriptions(Path(args.skills_root), skill_dir) if args.prescreen else None,
+            prescreen_margin=args.prescreen_margin,
+            executor=executor,
+        )
+        elapsed = time.time() - t0
+        (skill_results / "results.json").write_text(json.dumps(output, indent=2))
+        name, _, _ = parse_skill_md(skill_dir)
+        (skill_results / "report.html").write_text(generate_html(output, auto_refresh=False, skill_name=name))
+        return output, elapsed
+
+    if args.verbose:
+        print(f"Optimizing {len(pairs)} skills on a shared pool of {args.num_workers} workers", file=sys.stderr)
+
+    summaries: dict[str, dict] = {}
+    start = time.time()
+    # One sandbox pool and one set of probe workers for every skill's loop
+    with SandboxPool(args.num_workers, project_root=find_project_root()) as sandboxes, \
+            make_executor(args.engine, args.num_workers) as executor:
+        with ThreadPoolExecutor(max_workers=args.concurrent_skills or len(pairs)) as threads:
+            futures = {
+                threads.submit(optimize, skill_dir, eval_path, sandboxes, executor): skill_dir.name
+                for skill_dir, eval_path in pairs
+            }
+            for future in as_completed(futures):
+                skill = futures[future]
+                try:
+                    output, elapsed = future.result()
+                except Exception as e:
+                    # One broken skill shouldn't sink the rest of the batch
+                    summaries[skill] = {"error": f"{type(e).__name__}: {e}"}
+                    if args.verbose:
+                        print(f"[{skill}] failed: {summaries[skill]['error']}", file=sys.stderr)
+                    continue
+                summaries[skill] = skill_summary(output, elapsed)
+                if args.verbose:
+                    s = summaries[skill]
+                    print(f"[{skill}] {s['original_score']} -> {s['best_score']} "
+                          f"after {s['iterations_run']} iterations ({s['exit_reason']}, {elapsed:.0f}s)", file=sys.stderr)
+
+    summary = {
+        "skills_root": args.skills_root,
+        "num_workers": args.num_workers,
+        "wall_s": round(time.time() - start, 2),
+        "skipped": skipped,
+        "usage": sum_usage([s["usage"] for s in summaries.values() if "usage" in s]),
+        "skills": {name: summaries[name] for name in sorted(summaries)},
+    }
+    json_output = json.dumps(summary, indent=2)
+    print(json_output)
+    (results_dir / "summary.json").write_text(json_output)
+    (results_dir / "report.html").write_text(generate_batch_html(summary))
+    print(f"Results saved to: {results_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,17 +6,36 @@ for a set of queries. Outputs results as JSON.
 """
 
 import argparse
+import hashlib
+import heapq
+import itertools
 import json
+import math
 import os
 import select
 import subprocess
 import sys
 import time
 import uuid
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
 from pathlib import Path
 
-from scripts.utils import parse_skill_md
+from scripts.concurrency import AIMDController
+from scripts.sandbox import SandboxPool, command_content
+from scripts.scheduling import LatencyHints, TailIdleMeter
+from scripts.stream_json import NDJSONReader, SkillChoiceDetector, TriggerDetector, UsageMeter, sum_usage
+from scripts.trigger_cache import TriggerCache
+from scripts.utils import parse_skill_md, percentile
+
+# Wald SPRT settings for --early-stop sprt: test p = threshold - delta
+# against p = threshold + delta with these error rates.
+SPRT_DELTA = 0.35
+SPRT_ALPHA = 0.1
+SPRT_BETA = 0.1
+
+# How often a run_eval whose queue is stalled on a shared, fully leased
+# SandboxPool checks for a free sandbox while its own probes are in flight
+SANDBOX_POLL = 0.25
 
 
 def find_project_root() -> Path:
@@ -32,6 +51,90 @@ def find_project_root() -> Path:
     return current
 
 
+def write_command_file(project_root: str, skill_name: str, skill_description: str) -> tuple[str, Path]:
+    """Install a uniquely named command file for the skill under test.
+
+    Returns (clean_name, command_file). The clean name is what we look for in
+    the Skill/Read tool input to decide whether the skill was triggered.
+    """
+    unique_id = uuid.uuid4().hex[:8]
+    clean_name = f"{skill_name}-skill-{unique_id}"
+    project_commands_dir = Path(project_root) / ".claude" / "commands"
+    command_file = project_commands_dir / f"{clean_name}.md"
+
+    project_commands_dir.mkdir(parents=True, exist_ok=True)
+    command_file.write_text(command_content(skill_name, skill_description))
+    return clean_name, command_file
+
+
+def claude_command(query: str, model: str | None) -> list[str]:
+    """Build the `claude -p` invocation for one trigger probe."""
+    cmd = [
+        "claude",
+        "-p", query,
+        "--output-format", "stream-json",
+        "--verbose",
+        "--include-partial-messages",
+    ]
+    if model:
+        cmd.extend(["--model", model])
+    return cmd
+
+
+def claude_env() -> dict[str, str]:
+    """Return the environment for nested `claude -p` subprocesses.
+
+    Removes the CLAUDECODE env var to allow nesting claude -p inside a
+    Claude Code session. The guard is for interactive terminal conflicts;
+    programmatic subprocess usage is safe.
+    """
+    return {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
+
+
+class ProbeTimeout(TimeoutError):
+    """A probe reached no decision in time; carries the timing seen so far."""
+
+    def __init__(self, message: str, timing: dict | None = None):
+        super().__init__(message)
+        self.timing = timing or {}
+
+    def __reduce__(self):
+        # Keep timing when the exception crosses a process pool boundary
+        return (ProbeTimeout, (str(self), self.timing))
+
+
+def probe_record(
+    triggered: bool,
+    detected_by: str,
+    started: float,
+    spawned: float,
+    first_event: float | None,
+    decided: float,
+    killed: bool,
+    usage: dict | None = None,
+) -> dict:
+    """Build the result of one probe from monotonic timestamps.
+
+    Times are seconds since the probe started: spawn_s until the CLI process
+    existed, first_event_s until its first stream-json event, decision_s until
+    the trigger decision. detection is "early" when a partial-message stream
+    event decided it and "late" for the assistant/result/end-of-output
+    fallbacks; killed says whether the process was still running and had to be
+    killed. usage is the UsageMeter record (tokens and cost, flagged estimated
+    when the process was killed before its result event).
+    """
+    return {
+        "triggered": triggered,
+        "detected_by": detected_by,
+        "detection": "early" if detected_by == "stream_event" else "late",
+        "spawn_s": round(spawned - started, 3),
+        "first_event_s": round(first_event - started, 3) if first_event is not None else None,
+        "decision_s": round(decided - started, 3),
+        "killed": killed,
+        "usage": usage,
+    }
+
+
 def run_single_query(
     query: str,
     skill_name: str,
@@ -39,148 +142,232 @@ def run_single_query(
     timeout: int,
     project_root: str,
     model: str | None = None,
-) -> bool:
-    """Run a single query and return whether the skill was triggered.
+    clean_name: str | None = None,
+    detector: TriggerDetector | SkillChoiceDetector | None = None,
+) -> dict:
+    """Run a single query and report whether the skill was triggered.
 
     Creates a command file in .claude/commands/ so it appears in Claude's
     available_skills list, then runs `claude -p` with the raw query.
     Uses --include-partial-messages to detect triggering early from
     stream events (content_block_start) rather than waiting for the
     full assistant message, which only arrives after tool execution.
+
+    If clean_name is given, project_root is a sandbox that already has that
+    command installed (see sandbox.py) and no file is created or removed.
+    A detector replaces the usual TriggerDetector for clean_name; with a
+    SkillChoiceDetector (see collision_matrix.py) the record's "triggered" is
+    the chosen command's clean name, or a falsy value if none was chosen.
+
+    Returns a probe_record() dict with the decision and its timing. Raises
+    ProbeTimeout if no decision is reached within timeout, and RuntimeError if
+    claude exits non-zero before deciding.
     """
-    unique_id = uuid.uuid4().hex[:8]
-    clean_name = f"{skill_name}-skill-{unique_id}"
-    project_commands_dir = Path(project_root) / ".claude" / "commands"
-    command_file = project_commands_dir / f"{clean_name}.md"
+    command_file = None
+    if detector is None:
+        if clean_name is None:
+            clean_name, command_file = write_command_file(project_root, skill_name, skill_description)
+        detector = TriggerDetector(clean_name)
 
     try:
-        project_commands_dir.mkdir(parents=True, exist_ok=True)
-        # Use YAML block scalar to avoid breaking on quotes in description
-        indented_desc = "\n  ".join(skill_description.split("\n"))
-        command_content = (
-            f"---\n"
-            f"description: |\n"
-            f"  {indented_desc}\n"
-            f"---\n\n"
-            f"# {skill_name}\n\n"
-            f"This skill handles: {skill_description}\n"
-        )
-        command_file.write_text(command_content)
-
-        cmd = [
-            "claude",
-            "-p", query,
-            "--output-format", "stream-json",
-            "--verbose",
-            "--include-partial-messages",
-        ]
-        if model:
-            cmd.extend(["--model", model])
-
-        # Remove CLAUDECODE env var to allow nesting claude -p inside a
-        # Claude Code session. The guard is for interactive terminal conflicts;
-        # programmatic subprocess usage is safe.
-        env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
-
+        started = time.monotonic()
         process = subprocess.Popen(
-            cmd,
+            claude_command(query, model),
             stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
             cwd=project_root,
-            env=env,
+            env=claude_env(),
         )
+        spawned = time.monotonic()
 
-        triggered = False
-        start_time = time.time()
-        buffer = ""
-        # Track state for stream event detection
-        pending_tool_name = None
-        accumulated_json = ""
+        meter = UsageMeter()
+        reader = NDJSONReader()
+        fd = process.stdout.fileno()
+        deadline = started + timeout
+        first_event = None
+        decision = None
 
         try:
-            while time.time() - start_time < timeout:
-                if process.poll() is not None:
-                    remaining = process.stdout.read()
-                    if remaining:
-                        buffer += remaining.decode("utf-8", errors="replace")
-                    break
-
-                ready, _, _ = select.select([process.stdout], [], [], 1.0)
-                if not ready:
-                    continue
-
-                chunk = os.read(process.stdout.fileno(), 8192)
-                if not chunk:
-                    break
-                buffer += chunk.decode("utf-8", errors="replace")
-
-                while "\n" in buffer:
-                    line, buffer = buffer.split("\n", 1)
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    try:
-                        event = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
-
-                    # Early detection via stream events
-                    if event.get("type") == "stream_event":
-                        se = event.get("event", {})
-                        se_type = se.get("type", "")
-
-                        if se_type == "content_block_start":
-                            cb = se.get("content_block", {})
-                            if cb.get("type") == "tool_use":
-                                tool_name = cb.get("name", "")
-                                if tool_name in ("Skill", "Read"):
-                                    pending_tool_name = tool_name
-                                    accumulated_json = ""
-                                else:
-                                    return False
-
-                        elif se_type == "content_block_delta" and pending_tool_name:
-                            delta = se.get("delta", {})
-                            if delta.get("type") == "input_json_delta":
-                                accumulated_json += delta.get("partial_json", "")
-                                if clean_name in accumulated_json:
-                                    return True
-
-                        elif se_type in ("content_block_stop", "message_stop"):
-                            if pending_tool_name:
-                                return clean_name in accumulated_json
-                            if se_type == "message_stop":
-                                return False
-
-                    # Fallback: full assistant message
-                    elif event.get("type") == "assistant":
-                        message = event.get("message", {})
-                        for content_item in message.get("content", []):
-                            if content_item.get("type") != "tool_use":
-                                continue
-                            tool_name = content_item.get("name", "")
-                            tool_input = content_item.get("input", {})
-                            if tool_name == "Skill" and clean_name in tool_input.get("skill", ""):
-                                triggered = True
-                            elif tool_name == "Read" and clean_name in tool_input.get("file_path", ""):
-                                triggered = True
-                            return triggered
-
-                    elif event.get("type") == "result":
-                        return triggered
+            while decision is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                    raise ProbeTimeout(
+                        f"no trigger decision within {timeout}s",
+                        {"spawn_s": round(spawned - started, 3),
+                         "first_event_s": round(first_event - started, 3) if first_event else None,
+                         "usage": meter.record()},
+                    )
+
+                chunk = os.read(fd, 65536)
+                for event in reader.feed(chunk) if chunk else reader.close():
+                    first_event = first_event or time.monotonic()
+                    meter.feed(event)
+                    if decision is None:
+                        decision = detector.feed(event)
+
+                if decision is None and not chunk:
+                    # Output ended without a decision
+                    returncode = process.wait(timeout=max(deadline - time.monotonic(), 0.1))
+                    if returncode != 0:
+                        raise RuntimeError(f"claude -p exited {returncode}")
+                    decision = False
+            decided = time.monotonic()
         finally:
             # Clean up process on any exit path (return, exception, timeout)
-            if process.poll() is None:
+            killed = process.poll() is None
+            if killed:
                 process.kill()
                 process.wait()
 
-        return triggered
+        return probe_record(
+            decision, detector.detected_by or "end_of_output",
+            started, spawned, first_event, decided, killed, meter.record(),
+        )
     finally:
-        if command_file.exists():
+        if command_file is not None and command_file.exists():
             command_file.unlink()
 
 
+def _sprt_decided(triggers: int, runs: int, trigger_threshold: float) -> bool:
+    """Return True once Wald's SPRT is confident which side of the threshold the rate is on."""
+    p0 = min(max(trigger_threshold - SPRT_DELTA, 0.01), 0.99)
+    p1 = min(max(trigger_threshold + SPRT_DELTA, 0.01), 0.99)
+    llr = triggers * math.log(p1 / p0) + (runs - triggers) * math.log((1 - p1) / (1 - p0))
+    upper = math.log((1 - SPRT_BETA) / SPRT_ALPHA)
+    lower = math.log(SPRT_BETA / (1 - SPRT_ALPHA))
+    return llr >= upper or llr <= lower
+
+
+def _is_settled(
+    triggers: int,
+    runs: int,
+    runs_per_query: int,
+    trigger_threshold: float,
+    early_stop: str | None,
+) -> bool:
+    """Return True if no further runs are needed for this query.
+
+    Without early stopping a query is settled only after all runs_per_query
+    runs. With early_stop="bound" it is settled as soon as the remaining runs
+    can no longer move the trigger rate across the threshold in either
+    direction; "sprt" additionally stops when the sequential test is confident.
+    """
+    if runs >= runs_per_query:
+        return True
+    if early_stop is None:
+        return False
+    remaining = runs_per_query - runs
+    if triggers / runs_per_query >= trigger_threshold:
+        return True
+    if (triggers + remaining) / runs_per_query < trigger_threshold:
+        return True
+    if early_stop == "sprt" and runs > 0:
+        return _sprt_decided(triggers, runs, trigger_threshold)
+    return False
+
+
+def _runs_to_settle(
+    triggers: int,
+    runs: int,
+    runs_per_query: int,
+    trigger_threshold: float,
+    early_stop: str | None,
+) -> int:
+    """Return the fewest further runs that could settle a query, if they all agree."""
+    for extra in range(1, runs_per_query - runs + 1):
+        if _is_settled(triggers + extra, runs + extra, runs_per_query, trigger_threshold, early_stop):
+            return extra
+        if _is_settled(triggers, runs + extra, runs_per_query, trigger_threshold, early_stop):
+            return extra
+    return 0
+
+
+def latency_summary(probes: list[dict]) -> dict:
+    """Aggregate per-probe timing records into percentiles and counts."""
+    summary: dict = {}
+    for key in ("spawn_s", "first_event_s", "decision_s"):
+        values = [p[key] for p in probes if p.get(key) is not None]
+        summary[key] = {
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": max(values),
+        } if values else None
+    timeouts = [p for p in probes if p.get("error") == "ProbeTimeout"]
+    summary["probes"] = len(probes)
+    summary["early_detections"] = sum(1 for p in probes if p.get("detection") == "early")
+    summary["late_detections"] = sum(1 for p in probes if p.get("detection") == "late")
+    summary["killed"] = sum(1 for p in probes if p.get("killed"))
+    summary["timeouts"] = len(timeouts)
+    # A timeout with no output at all points at CLI startup, not the model
+    summary["timeouts_before_first_event"] = sum(1 for p in timeouts if p.get("first_event_s") is None)
+    return summary
+
+
+def _checkpoint_identity(skill_name: str, description: str, model: str | None) -> dict:
+    """Fields that tie a checkpoint line to one skill/description/model evaluation."""
+    return {
+        "skill_name": skill_name,
+        "description_sha256": hashlib.sha256(description.encode("utf-8")).hexdigest(),
+        "model": model,
+    }
+
+
+def load_checkpoint(
+    path: Path,
+    skill_name: str,
+    description: str,
+    model: str | None,
+) -> dict[tuple[str, int], bool]:
+    """Read completed (query, run_idx) outcomes back from a JSONL checkpoint.
+
+    Lines for a different skill, description or model are ignored, as are
+    errored runs (they are retried on resume) and a truncated final line.
+    """
+    identity = _checkpoint_identity(skill_name, description, model)
+    outcomes: dict[tuple[str, int], bool] = {}
+    if not path.exists():
+        return outcomes
+    for line in path.read_text().splitlines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if any(entry.get(k) != v for k, v in identity.items()):
+            continue
+        if entry.get("outcome") in ("triggered", "not_triggered"):
+            outcomes[(entry["query"], entry["run_idx"])] = entry["outcome"] == "triggered"
+    return outcomes
+
+
+def make_executor(engine: str, num_workers: int) -> Executor:
+    """Return the executor that runs the chosen engine's probes.
+
+    Make one per process and pass it to every run_eval call: concurrent calls
+    then share its num_workers workers instead of each starting its own.
+    """
+    if engine == "asyncio":
+        # Imported here because async_engine builds on the helpers above.
+        from scripts.async_engine import AsyncioExecutor
+        return AsyncioExecutor(max_workers=num_workers)
+    if engine == "warm":
+        from scripts.warm_workers import WarmExecutor
+        return WarmExecutor(max_workers=num_workers)
+    if engine == "pool":
+        return ProcessPoolExecutor(max_workers=num_workers)
+    raise ValueError(f"Unknown engine: {engine!r}")
+
+
+def _probe_function(engine: str, executor: Executor):
+    """The function the engine's executor runs for one probe."""
+    if engine == "asyncio":
+        from scripts.async_engine import run_single_query_async
+        return run_single_query_async
+    if engine == "warm":
+        return executor.run_query
+    return run_single_query
+
+
 def run_eval(
     eval_set: list[dict],
     skill_name: str,
@@ -191,68 +378,362 @@ def run_eval(
     runs_per_query: int = 1,
     trigger_threshold: float = 0.5,
     model: str | None = None,
+    cache: TriggerCache | None = None,
+    early_stop: str | None = None,
+    engine: str = "pool",
+    sandboxes: SandboxPool | None = None,
+    concurrency: AIMDController | None = None,
+    max_retries: int = 2,
+    retry_backoff: float = 2.0,
+    checkpoint_path: Path | None = None,
+    resume: bool = False,
+    latency_hints: LatencyHints | None = None,
+    executor: Executor | None = None,
 ) -> dict:
-    """Run the full eval set and return results."""
-    results = []
+    """Run the full eval set and return results.
 
-    with ProcessPoolExecutor(max_workers=num_workers) as executor:
-        future_to_info = {}
-        for item in eval_set:
-            for run_idx in range(runs_per_query):
-                future = executor.submit(
-                    run_single_query,
-                    item["query"],
-                    skill_name,
-                    description,
-                    timeout,
-                    str(project_root),
-                    model,
+    Each probe runs in its own sandbox (sandbox.py) on the given engine, and
+    is dispatched longest-expected first (scheduling.py). Runs that still fail
+    after max_retries are reported as errored and left out of trigger_rate.
+    """
+    results = []
+    query_triggers: dict[str, list[bool]] = {}
+    query_items: dict[str, dict] = {}
+    next_run: dict[str, int] = {}
+    # Runs scheduled for a query but not yet finished (queued or running)
+    outstanding: dict[str, int] = {}
+    # Heap of (tier, -expected seconds, seq, query, run_idx) waiting for a sandbox
+    ready: list[tuple[int, float, int, str, int]] = []
+    ready_seq = itertools.count()
+    future_to_info = {}
+    cache_hits = 0
+    cache_misses = 0
+    query_errors: dict[str, dict[str, int]] = {}
+    query_probes: dict[str, list[dict]] = {}
+    attempts: dict[tuple[str, int], int] = {}
+    # (due time, tiebreak, query, run_idx) for failed runs awaiting a retry
+    retries: list[tuple[float, int, str, int]] = []
+    retry_seq = itertools.count()
+    retry_count = 0
+    resumed: dict[tuple[str, int], bool] = {}
+    checkpoint = None
+    if checkpoint_path is not None:
+        if resume:
+            resumed = load_checkpoint(checkpoint_path, skill_name, description, model)
+        checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        checkpoint = open(checkpoint_path, "a" if resume else "w")
+        identity = _checkpoint_identity(skill_name, description, model)
+
+    def checkpoint_run(query: str, run_idx: int, outcome: bool | None, source: str) -> None:
+        """Append one finished run to the checkpoint file, if there is one."""
+        if checkpoint is None:
+            return
+        if outcome is None:
+            label = "errored"
+        else:
+            label = "triggered" if outcome else "not_triggered"
+        entry = {"query": query, "run_idx": run_idx, "outcome": label, "source": source, **identity}
+        checkpoint.write(json.dumps(entry) + "\n")
+        checkpoint.flush()
+
+    def expected_seconds(query: str) -> float:
+        if latency_hints is None:
+            return 0.0
+        expected = latency_hints.expected(query)
+        return expected if expected is not None else latency_hints.default()
+
+    def tier(query: str) -> int:
+        """1 for a query whose runs disagree so far (worth resolving first), else 2."""
+        triggers = query_triggers[query]
+        return 1 if 0 < sum(triggers) < len(triggers) else 2
+
+    def enqueue(query: str, run_idx: int, retry: bool = False) -> None:
+        priority = 0 if retry else tier(query)
+        heapq.heappush(ready, (priority, -expected_seconds(query), next(ready_seq), query, run_idx))
+
+    def reprioritize(query: str) -> None:
+        """Move a query's queued runs to the tier its latest evidence puts it in."""
+        new_tier = tier(query)
+        if not any(r[3] == query and r[0] not in (0, new_tier) for r in ready):
+            return
+        ready[:] = [(new_tier, *r[1:]) if r[3] == query and r[0] != 0 else r for r in ready]
+        heapq.heapify(ready)
+
+    def settled(query: str) -> bool:
+        triggers = query_triggers[query]
+        return _is_settled(sum(triggers), len(triggers), runs_per_query, trigger_threshold, early_stop)
+
+    def schedule(query: str) -> None:
+        """Queue runs for a query until enough are outstanding to possibly settle it."""
+        nonlocal cache_hits, cache_misses
+        while not settled(query) and next_run[query] < runs_per_query:
+            triggers = query_triggers[query]
+            if early_stop is None:
+                wanted = runs_per_query - len(triggers)
+            else:
+                wanted = _runs_to_settle(
+                    sum(triggers), len(triggers), runs_per_query, trigger_threshold, early_stop,
                 )
-                future_to_info[future] = (item, run_idx)
-
-        query_triggers: dict[str, list[bool]] = {}
-        query_items: dict[str, dict] = {}
-        for future in as_completed(future_to_info):
-            item, _ = future_to_info[future]
+            if outstanding[query] >= wanted:
+                return
+            run_idx = next_run[query]
+            next_run[query] += 1
+            if (query, run_idx) in resumed:
+                triggers.append(resumed[(query, run_idx)])
+                continue
+            if cache is not None:
+                cached = cache.get(skill_name, description, query, model, run_idx)
+                if cached is not None:
+                    cache_hits += 1
+                    triggers.append(cached)
+                    checkpoint_run(query, run_idx, cached, "cache")
+                    continue
+                cache_misses += 1
+            enqueue(query, run_idx)
+            outstanding[query] += 1
+
+    def dispatch() -> None:
+        """Submit queued runs, each into its own leased sandbox, while any are free."""
+        while ready:
+            if concurrency is not None and not concurrency.try_acquire():
+                return
+            sandbox = sandboxes.try_acquire(skill_name, description)
+            if sandbox is None:
+                if concurrency is not None:
+                    concurrency.release()
+                return
+            _, _, _, query, run_idx = heapq.heappop(ready)
+            future = executor.submit(
+                probe,
+                query,
+                skill_name,
+                description,
+                timeout,
+                str(sandbox.root),
+                model,
+                sandbox.clean_name,
+            )
+            future_to_info[future] = (query, run_idx, sandbox, time.monotonic())
+
+    def drop_pending(query: str) -> None:
+        """Forget queued runs and retries of a query that no longer needs them."""
+        queued = sum(1 for r in ready if r[3] == query)
+        if queued:
+            ready[:] = [r for r in ready if r[3] != query]
+            heapq.heapify(ready)
+            outstanding[query] -= queued
+        stale = [r for r in retries if r[2] == query]
+        if stale:
+            retries[:] = [r for r in retries if r[2] != query]
+            heapq.heapify(retries)
+            outstanding[query] -= len(stale)
+
+    def record(future) -> None:
+        """Fold one finished probe into the per-query state."""
+        nonlocal retry_count
+        query, run_idx, sandbox, submitted_at = future_to_info.pop(future)
+        # Concurrency slot first, so a caller woken by the sandbox finds both free
+        if concurrency is not None:
+            concurrency.release()
+        sandboxes.release(sandbox)
+        latency = time.monotonic() - submitted_at
+        try:
+            probe_result = future.result()
+        except Exception as e:
+            query_probes[query].append({
+                "run_idx": run_idx, "error": type(e).__name__, **getattr(e, "timing", {}),
+                "wall_s": round(latency, 3),
+            })
+            if concurrency is not None:
+                concurrency.on_failure(latency)
+            counts = query_errors[query]
+            counts["errors"] += 1
+            if isinstance(e, TimeoutError):
+                counts["timeouts"] += 1
+            attempt = attempts.get((query, run_idx), 0) + 1
+            attempts[(query, run_idx)] = attempt
+            if attempt <= max_retries:
+                delay = retry_backoff * 2 ** (attempt - 1)
+                print(f"Warning: query failed ({e}), retrying in {delay:.0f}s", file=sys.stderr)
+                heapq.heappush(retries, (time.monotonic() + delay, next(retry_seq), query, run_idx))
+                retry_count += 1
+                return
+            print(f"Warning: query failed after {attempt} attempts: {e}", file=sys.stderr)
+            counts["errored_runs"] += 1
+            checkpoint_run(query, run_idx, None, "probe")
+        else:
+            query_probes[query].append({"run_idx": run_idx, **probe_result, "wall_s": round(latency, 3)})
+            triggered = probe_result["triggered"]
+            if concurrency is not None:
+                concurrency.on_success(latency, expected_seconds(query) or None)
+            query_triggers[query].append(triggered)
+            checkpoint_run(query, run_idx, triggered, "probe")
+            if cache is not None:
+                cache.put(skill_name, description, query, model, run_idx, triggered)
+        outstanding[query] -= 1
+
+        if settled(query):
+            # Runs still waiting for it are no longer needed; ones already
+            # running report back and are counted above.
+            drop_pending(query)
+        else:
+            reprioritize(query)
+            schedule(query)
+
+    owns_sandboxes = sandboxes is None
+    if owns_sandboxes:
+        sandboxes = SandboxPool(num_workers, project_root=project_root)
+    workers = min(num_workers, sandboxes.size)
+    owns_executor = executor is None
+    if owns_executor:
+        executor = make_executor(engine, workers)
+    probe = _probe_function(engine, executor)
+
+    def capacity() -> int:
+        return min(workers, concurrency.limit) if concurrency is not None else workers
+
+    trajectory_start = len(concurrency.trajectory) - 1 if concurrency is not None else 0
+    try:
+        for item in eval_set:
             query = item["query"]
             query_items[query] = item
-            if query not in query_triggers:
-                query_triggers[query] = []
-            try:
-                query_triggers[query].append(future.result())
-            except Exception as e:
-                print(f"Warning: query failed: {e}", file=sys.stderr)
-                query_triggers[query].append(False)
+            query_triggers.setdefault(query, [])
+            next_run.setdefault(query, 0)
+            outstanding.setdefault(query, 0)
+            query_errors.setdefault(query, {"errors": 0, "timeouts": 0, "errored_runs": 0})
+            query_probes.setdefault(query, [])
+        for query in query_items:
+            schedule(query)
+        dispatch()
+
+        meter = TailIdleMeter(time.monotonic())
+        meter.tick(time.monotonic(), len(future_to_info), capacity(), starving=not (ready or retries))
+        while future_to_info or retries or ready:
+            in_flight = len(future_to_info)
+            # Wake up for whichever comes first: a finished probe or a due retry
+            until_retry = max(retries[0][0] - time.monotonic(), 0) if retries else None
+            # Queued work but every sandbox (or concurrency slot) taken by
+            # another caller sharing the pool
+            blocked = bool(ready) and (
+                not sandboxes.available or (concurrency is not None and concurrency.saturated)
+            )
+            if future_to_info:
+                if blocked:
+                    until_retry = min(until_retry, SANDBOX_POLL) if until_retry is not None else SANDBOX_POLL
+                done, _ = wait(future_to_info, timeout=until_retry, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future)
+            elif ready and concurrency is not None and concurrency.saturated:
+                # Every slot is held by other callers sharing the controller
+                time.sleep(min(until_retry, SANDBOX_POLL) if until_retry is not None else SANDBOX_POLL)
+            elif ready:
+                sandboxes.wait_for_release(until_retry)
+            else:
+                time.sleep(until_retry)
+            now = time.monotonic()
+            while retries and retries[0][0] <= now:
+                _, _, query, run_idx = heapq.heappop(retries)
+                enqueue(query, run_idx, retry=True)
+            dispatch()
+            meter.tick(now, in_flight, capacity(), starving=not (ready or retries))
+    finally:
+        if future_to_info:
+            # Leaving early: hand back what in-flight probes hold in shared pools
+            wait(future_to_info)
+            for _, _, sandbox, _ in future_to_info.values():
+                if concurrency is not None:
+                    concurrency.release()
+                sandboxes.release(sandbox)
+        if owns_executor:
+            executor.shutdown()
+        if owns_sandboxes:
+            sandboxes.close()
+        if checkpoint is not None:
+            checkpoint.close()
+
+    if cache is not None:
+        cache.prune()
 
     for query, triggers in query_triggers.items():
         item = query_items[query]
-        trigger_rate = sum(triggers) / len(triggers)
+        counts = query_errors[query]
         should_trigger = item["should_trigger"]
-        if should_trigger:
-            did_pass = trigger_rate >= trigger_threshold
+        if triggers:
+            trigger_rate = sum(triggers) / len(triggers)
+            if should_trigger:
+                did_pass = trigger_rate >= trigger_threshold
+            else:
+                did_pass = trigger_rate < trigger_threshold
         else:
-            did_pass = trigger_rate < trigger_threshold
-        results.append({
+            # Every run errored: there is no evidence either way, so the
+            # query can't pass, but it is flagged rather than scored 0/N.
+            trigger_rate = None
+            did_pass = False
+        result = {
             "query": query,
             "should_trigger": should_trigger,
             "trigger_rate": trigger_rate,
             "triggers": sum(triggers),
             "runs": len(triggers),
             "pass": did_pass,
-        })
+            "errors": counts["errors"],
+            "timeouts": counts["timeouts"],
+            "errored_runs": counts["errored_runs"],
+            "probes": query_probes[query],
+            "usage": sum_usage([p.get("usage") for p in query_probes[query]]),
+        }
+        if not triggers:
+            result["errored"] = True
+        results.append(result)
 
     passed = sum(1 for r in results if r["pass"])
     total = len(results)
 
+    summary = {
+        "total": total,
+        "passed": passed,
+        "failed": total - passed,
+        "errors": {
+            "failed_attempts": sum(r["errors"] for r in results),
+            "timeouts": sum(r["timeouts"] for r in results),
+            "retries": retry_count,
+            "errored_runs": sum(r["errored_runs"] for r in results),
+            "errored_queries": sum(1 for r in results if r.get("errored")),
+        },
+        "latency": latency_summary([p for r in results for p in r["probes"]]),
+        "usage": sum_usage([r["usage"] for r in results]),
+        "schedule": {
+            "order": "longest_expected_first" if latency_hints else "eval_set",
+            **meter.summary(time.monotonic(), workers),
+        },
+    }
+    if cache is not None:
+        summary["cache"] = {"hits": cache_hits, "misses": cache_misses}
+    if resume:
+        summary["resumed_runs"] = sum(1 for key in resumed if key[0] in query_items)
+    if concurrency is not None:
+        summary["concurrency"] = concurrency.summary(since=trajectory_start)
+    if engine == "warm":
+        warm_probes = [p for r in results for p in r["probes"] if "warm" in p]
+        summary["warm"] = {
+            "supported": executor.supported,
+            "sessions_started": executor.sessions_started,
+            "reused_probes": sum(1 for p in warm_probes if p["warm"]),
+            "one_shot_probes": sum(1 for r in results for p in r["probes"] if "warm" not in p and "error" not in p),
+        }
+    if early_stop is not None:
+        runs_used = sum(r["runs"] for r in results)
+        summary["early_stop"] = {
+            "mode": early_stop,
+            "runs_used": runs_used,
+            "runs_saved": total * runs_per_query - runs_used,
+        }
+
     return {
         "skill_name": skill_name,
         "description": description,
         "results": results,
-        "summary": {
-            "total": total,
-            "passed": passed,
-            "failed": total - passed,
-        },
+        "summary": summary,
     }
 
 
@@ -266,6 +747,23 @@ def main():
     parser.add_argument("--runs-per-query", type=int, default=3, help="Number of runs per query")
     parser.add_argument("--trigger-threshold", type=float, default=0.5, help="Trigger rate threshold")
     parser.add_argument("--model", default=None, help="Model to use for claude -p (default: user's configured model)")
+    parser.add_argument("--early-stop", choices=["bound", "sprt"], default=None,
+                        help="Stop scheduling runs for a query once its pass/fail is settled (bound) or the SPRT is confident (sprt)")
+    parser.add_argument("--engine", choices=["pool", "asyncio", "warm"], default="pool",
+                        help="Process pool of workers, one asyncio event loop driving all claude -p children, "
+                             "or warm streaming-input sessions reused across queries")
+    parser.add_argument("--adaptive-concurrency", action="store_true",
+                        help="Treat --num-workers as a ceiling and adapt in-flight probes to latency and failures (AIMD)")
+    parser.add_argument("--max-retries", type=int, default=2,
+                        help="Retries for a probe that times out or errors; runs that still fail are left out of the trigger rate")
+    parser.add_argument("--retry-backoff", type=float, default=2.0, help="Seconds before the first retry (doubles each attempt)")
+    parser.add_argument("--checkpoint", default=None, help="Append each finished run to this JSONL file as it completes")
+    parser.add_argument("--resume", action="store_true", help="Reuse runs already in --checkpoint and only run the missing ones")
+    parser.add_argument("--cache-dir", default=None, help="Directory for the on-disk trigger cache (default: no cache)")
+    parser.add_argument("--cache-max-mb", type=float, default=50, help="Evict oldest cache entries beyond this size")
+    parser.add_argument("--cache-max-age-days", type=float, default=7, help="Evict cache entries older than this")
+    parser.add_argument("--latency-hints", default=None,
+                        help="JSON file of per-query probe times: schedule longest-expected first, then update it")
     parser.add_argument("--verbose", action="store_true", help="Print progress to stderr")
     args = parser.parse_args()
 
@@ -276,30 +774,92 @@ def main():
         print(f"Error: No SKILL.md found at {skill_path}", file=sys.stderr)
         sys.exit(1)
 
+    if args.resume and not args.checkpoint:
+        print("Error: --resume requires --checkpoint", file=sys.stderr)
+        sys.exit(1)
+
     name, original_description, content = parse_skill_md(skill_path)
     description = args.description or original_description
     project_root = find_project_root()
+    cache = None
+    if args.cache_dir:
+        cache = TriggerCache(
+            Path(args.cache_dir),
+            max_bytes=int(args.cache_max_mb * 1024 * 1024),
+            max_age=args.cache_max_age_days * 24 * 3600,
+        )
+
+    latency_hints = LatencyHints(Path(args.latency_hints)) if args.latency_hints else None
 
     if args.verbose:
         print(f"Evaluating: {description}", file=sys.stderr)
 
-    output = run_eval(
-        eval_set=eval_set,
-        skill_name=name,
-        description=description,
-        num_workers=args.num_workers,
-        timeout=args.timeout,
-        project_root=project_root,
-        runs_per_query=args.runs_per_query,
-        trigger_threshold=args.trigger_threshold,
-        model=args.model,
-    )
+    with make_executor(args.engine, args.num_workers) as executor:
+        output = run_eval(
+            eval_set=eval_set,
+            skill_name=name,
+            description=description,
+            num_workers=args.num_workers,
+            timeout=args.timeout,
+            project_root=project_root,
+            runs_per_query=args.runs_per_query,
+            trigger_threshold=args.trigger_threshold,
+            model=args.model,
+            cache=cache,
+            early_stop=args.early_stop,
+            engine=args.engine,
+            concurrency=AIMDController(args.num_workers) if args.adaptive_concurrency else None,
+            max_retries=args.max_retries,
+            retry_backoff=args.retry_backoff,
+            checkpoint_path=Path(args.checkpoint) if args.checkpoint else None,
+            resume=args.resume,
+            latency_hints=latency_hints,
+            executor=executor,
+        )
+    if latency_hints is not None:
+        latency_hints.update(output["results"])
+        latency_hints.save()
 
     if args.verbose:
         summary = output["summary"]
         print(f"Results: {summary['passed']}/{summary['total']} passed", file=sys.stderr)
+        if "cache" in summary:
+            print(f"Cache: {summary['cache']['hits']} hits, {summary['cache']['misses']} misses", file=sys.stderr)
+        if "early_stop" in summary:
+            print(f"Early stop: {summary['early_stop']['runs_saved']} runs saved", file=sys.stderr)
+        if "resumed_runs" in summary:
+            print(f"Resumed: {summary['resumed_runs']} runs from checkpoint", file=sys.stderr)
+        errors = summary["errors"]
+        if errors["failed_attempts"]:
+            print(
+                f"Errors: {errors['failed_attempts']} failed attempts ({errors['timeouts']} timeouts), "
+                f"{errors['retries']} retries, {errors['errored_runs']} runs errored",
+                file=sys.stderr,
+            )
+        latency = summary["latency"]
+        if latency["decision_s"]:
+            print(
+                f"Latency: decision p50={latency['decision_s']['p50']}s p99={latency['decision_s']['p99']}s, "
+                f"{latency['early_detections']} early / {latency['late_detections']} late detections, "
+                f"{latency['killed']} killed, {latency['timeouts']} timeouts",
+                file=sys.stderr,
+            )
+        if "concurrency" in summary:
+            print(f"Concurrency: final limit {summary['concurrency']['final_limit']}/{args.num_workers}", file=sys.stderr)
+        usage = summary["usage"]
+        print(f"Usage: {usage['input_tokens'] + usage['cache_creation_input_tokens'] + usage['cache_read_input_tokens']} "
+              f"input / {usage['output_tokens']} output tokens, ${usage['cost_usd']:.4f} "
+              f"({usage['estimated_probes']}/{usage['probes']} probes estimated)", file=sys.stderr)
+        schedule = summary["schedule"]
+        print(f"Schedule: {schedule['order']}, tail {schedule['tail_s']}s with "
+              f"{schedule['tail_idle_slot_s']} worker-seconds idle ({schedule['tail_idle_fraction']:.0%} of capacity)",
+              file=sys.stderr)
+        if "warm" in summary:
+            warm = summary["warm"]
+            print(f"Warm sessions: {warm['sessions_started']} started, {warm['reused_probes']} probes reused a session, "
+                  f"{warm['one_shot_probes']} fell back to one-shot", file=sys.stderr)
         for r in output["results"]:
-            status = "PASS" if r["pass"] else "FAIL"
+            status = "ERR " if r.get("errored") else "PASS" if r["pass"] else "FAIL"
             rate_str = f"{r['triggers']}/{r['runs']}"
             print(f"  [{status}] rate={rate_str} expected={r['should_trigger']}: {r['query'][:70]}", file=sys.stderr)
 
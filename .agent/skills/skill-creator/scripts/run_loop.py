@@ -8,16 +8,30 @@ overfitting.
 
 import argparse
 import json
+import os
 import random
+import statistics
 import sys
 import tempfile
 import time
 import webbrowser
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
 
+from scripts.budget import Budget
+from scripts.concurrency import AIMDController
 from scripts.generate_report import generate_html
-from scripts.improve_description import improve_description
-from scripts.run_eval import find_project_root, run_eval
+from scripts.history_compaction import DEFAULT_HISTORY_TOKEN_BUDGET
+from scripts.improve_description import CANDIDATE_APPROACHES, improve_description
+from scripts.lexical_screen import DEFAULT_MARGIN, LexicalScreen, competitor_descriptions, pearson, screen_candidates
+from scripts.run_eval import find_project_root, latency_summary, make_executor, run_eval
+from scripts.racing import race_candidates, race_order
+from scripts.response_cache import ResponseCache
+from scripts.sandbox import SandboxPool
+from scripts.scheduling import LatencyHints
+from scripts.stream_json import sum_usage
+from scripts.trigger_cache import TriggerCache
 from scripts.utils import parse_skill_md
 
 
@@ -44,6 +58,148 @@ def split_eval_set(eval_set: list[dict], holdout: float, seed: int = 42) -> tupl
     return train_set, test_set
 
 
+def kfold_split(eval_set: list[dict], folds: int, seed: int = 42) -> list[list[dict]]:
+    """Split eval set into k folds, each stratified by should_trigger."""
+    rng = random.Random(seed)
+    trigger = [e for e in eval_set if e["should_trigger"]]
+    no_trigger = [e for e in eval_set if not e["should_trigger"]]
+    rng.shuffle(trigger)
+    rng.shuffle(no_trigger)
+    fold_sets: list[list[dict]] = [[] for _ in range(folds)]
+    # Deal both groups round-robin, continuing where the first left off so
+    # fold sizes differ by at most one
+    for i, item in enumerate(trigger + no_trigger):
+        fold_sets[i % folds].append(item)
+    return fold_sets
+
+
+def cv_summary(results: list[dict], fold_sets: list[list[dict]], blind_folds: list[int]) -> dict:
+    """Per-fold pass rates of one candidate's results, with their mean and spread.
+
+    held_out is the mean over blind_folds, the folds no improvement step ever
+    sees results for, so it is out of sample for every candidate alike; the
+    mean over all folds is partly in-sample.
+    """
+    by_query = {r["query"]: r for r in results}
+    scores = []
+    for fold in fold_sets:
+        fold_results = [by_query[item["query"]] for item in fold if item["query"] in by_query]
+        scores.append(sum(1 for r in fold_results if r["pass"]) / len(fold_results) if fold_results else 0.0)
+    variance = statistics.variance(scores) if len(scores) > 1 else 0.0
+    return {
+        "fold_scores": [round(score, 3) for score in scores],
+        "blind_folds": blind_folds,
+        "held_out": round(statistics.mean(scores[i] for i in blind_folds), 4),
+        "mean": round(statistics.mean(scores), 4),
+        "variance": round(variance, 4),
+        "std": round(variance ** 0.5, 4),
+    }
+
+
+def save_checkpoint(path: Path, state: dict) -> None:
+    """Write loop state as JSON, replacing the previous checkpoint atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    tmp.write_text(json.dumps(state, indent=2))
+    os.replace(tmp, path)
+
+
+def blind_entry(entry: dict, hidden: set[str]) -> dict:
+    """A history entry as the improver may see it: no test scores, and train
+    results recomputed over every evaluated query outside hidden.
+    """
+    results = [r for r in entry["train_results"] + (entry.get("test_results") or []) if r["query"] not in hidden]
+    summary = _summarize(results)
+    blinded = {k: v for k, v in entry.items() if not k.startswith("test_") and k not in ("cv", "prescreen")}
+    blinded.update({
+        "train_passed": summary["passed"], "train_failed": summary["failed"], "train_total": summary["total"],
+        "train_results": results,
+        "passed": summary["passed"], "failed": summary["failed"], "total": summary["total"], "results": results,
+    })
+    return blinded
+
+
+def _summarize(results: list[dict]) -> dict:
+    passed = sum(1 for r in results if r["pass"])
+    return {"passed": passed, "failed": len(results) - passed, "total": len(results)}
+
+
+def print_eval_stats(label: str, results: list[dict], elapsed: float) -> None:
+    pos = [r for r in results if r["should_trigger"]]
+    neg = [r for r in results if not r["should_trigger"]]
+    tp = sum(r["triggers"] for r in pos)
+    pos_runs = sum(r["runs"] for r in pos)
+    fn = pos_runs - tp
+    fp = sum(r["triggers"] for r in neg)
+    neg_runs = sum(r["runs"] for r in neg)
+    tn = neg_runs - fp
+    total = tp + tn + fp + fn
+    precision = tp / (tp + fp) if (tp + fp) > 0 else 1.0
+    recall = tp / (tp + fn) if (tp + fn) > 0 else 1.0
+    accuracy = (tp + tn) / total if total > 0 else 0.0
+    print(f"{label}: {tp+tn}/{total} correct, precision={precision:.0%} recall={recall:.0%} accuracy={accuracy:.0%} ({elapsed:.1f}s)", file=sys.stderr)
+    for r in results:
+        status = "ERR " if r.get("errored") else "PASS" if r["pass"] else "FAIL"
+        rate_str = f"{r['triggers']}/{r['runs']}"
+        print(f"  [{status}] rate={rate_str} expected={r['should_trigger']}: {r['query'][:60]}", file=sys.stderr)
+
+
+def merge_eval_outputs(first: dict, second: dict) -> dict:
+    """Combine two run_eval outputs over disjoint queries into one."""
+    results = first["results"] + second["results"]
+    summary = dict(first["summary"])
+    summary.update(_summarize(results))
+    summary["latency"] = latency_summary([p for r in results for p in r["probes"]])
+    summary["usage"] = sum_usage([first["summary"]["usage"], second["summary"]["usage"]])
+    return {"results": results, "summary": summary}
+
+
+def history_entry(
+    iteration: int,
+    description: str,
+    all_results: dict,
+    train_set: list[dict],
+    test_set: list[dict],
+    eval_elapsed: float,
+) -> dict:
+    """Split one run_eval over train + test back apart into a history record."""
+    train_queries_set = {q["query"] for q in train_set}
+    train_result_list = [r for r in all_results["results"] if r["query"] in train_queries_set]
+    test_result_list = [r for r in all_results["results"] if r["query"] not in train_queries_set]
+    train_summary = _summarize(train_result_list)
+    test_summary = _summarize(test_result_list) if test_set else None
+    return {
+        "iteration": iteration,
+        "description": description,
+        "train_passed": train_summary["passed"],
+        "train_failed": train_summary["failed"],
+        "train_total": train_summary["total"],
+        "train_results": train_result_list,
+        "test_passed": test_summary["passed"] if test_summary else None,
+        "test_failed": test_summary["failed"] if test_summary else None,
+        "test_total": test_summary["total"] if test_summary else None,
+        "test_results": test_result_list if test_summary else None,
+        "eval_elapsed": round(eval_elapsed, 2),
+        "eval_latency": all_results["summary"]["latency"],
+        "eval_schedule": all_results["summary"]["schedule"],
+        "eval_usage": all_results["summary"]["usage"],
+        # For backward compat with report generator
+        "passed": train_summary["passed"],
+        "failed": train_summary["failed"],
+        "total": train_summary["total"],
+        "results": train_result_list,
+    }
+
+
+def total_usage(history: list[dict]) -> dict:
+    """Sum eval usage over history, plus candidates eliminated in races."""
+    # One race per iteration, shared by its survivors' entries
+    races = {h["iteration"]: h["race"] for h in history if h.get("race")}
+    return sum_usage(
+        [h["eval_usage"] for h in history] + [race["eliminated_usage"] for race in races.values()]
+    )
+
+
 def run_loop(
     eval_set: list[dict],
     skill_path: Path,
@@ -58,14 +214,74 @@ def run_loop(
     verbose: bool,
     live_report_path: Path | None = None,
     log_dir: Path | None = None,
+    cache: TriggerCache | None = None,
+    early_stop: str | None = None,
+    engine: str = "pool",
+    sandboxes: SandboxPool | None = None,
+    adaptive_concurrency: bool = False,
+    max_retries: int = 2,
+    latency_hints: LatencyHints | None = None,
+    candidates: int = 1,
+    beam_width: int = 1,
+    race: bool = False,
+    pipeline: bool = False,
+    folds: int = 0,
+    checkpoint_path: Path | None = None,
+    resume: dict | None = None,
+    budget: Budget | None = None,
+    history_token_budget: int | None = DEFAULT_HISTORY_TOKEN_BUDGET,
+    response_cache: ResponseCache | None = None,
+    prescreen: bool = False,
+    competitors: list[str] | None = None,
+    prescreen_margin: float = DEFAULT_MARGIN,
+    executor: Executor | None = None,
 ) -> dict:
-    """Run the eval + improvement loop."""
+    """Run the eval + improvement loop.
+
+    Each iteration evaluates the current description(s), then asks
+    improve_description for the next ones; the search options (beam, race,
+    pipeline, folds, budget, prescreen) are described in --help and in the
+    helper modules. With checkpoint_path the loop state is saved after every
+    step, and passing it back as resume continues from the last one.
+    """
     project_root = find_project_root()
     name, original_description, content = parse_skill_md(skill_path)
     current_description = description_override or original_description
-
-    # Split into train/test if holdout > 0
-    if holdout > 0:
+    beam_mode = candidates > 1 or beam_width > 1
+
+    if budget is None:
+        budget = Budget()
+    max_calls = budget.limits["cli_calls"]
+    if resume is None and max_calls is not None and len(eval_set) > max_calls:
+        # Not even one run of every query fits; the baseline still runs, on
+        # a sample balanced between should and shouldn't trigger
+        eval_set = race_order(eval_set)[:max(max_calls, 1)]
+        if verbose:
+            print(f"Budget: evaluating {len(eval_set)} sampled queries", file=sys.stderr)
+
+    # Split into train/test if holdout > 0, or into k folds
+    fold_sets: list[list[dict]] = []
+    blind_folds: list[int] = []
+    if resume is not None:
+        # Same splits as the interrupted run, whatever the split settings
+        train_set = resume["splits"]["train_set"]
+        test_set = resume["splits"]["test_set"]
+        fold_sets = resume["splits"]["fold_sets"]
+        blind_folds = resume["splits"].get("blind_folds", [0] if fold_sets else [])
+        if verbose:
+            print(f"Resuming after iteration {resume['iteration']} ({resume['phase']}): "
+                  f"{len(train_set)} train, {len(test_set)} test", file=sys.stderr)
+    elif folds > 1:
+        fold_sets = kfold_split(eval_set, folds)
+        # The same folds are held out for the whole run: candidates are all
+        # selected on them, and no improver sees their results
+        blind_folds = list(range(min(max(1, round(folds * holdout)), folds - 1)))
+        test_set = [item for i in blind_folds for item in fold_sets[i]]
+        train_set = [item for i, fold in enumerate(fold_sets) if i not in blind_folds for item in fold]
+        if verbose:
+            print(f"Cross-validation: {folds} folds of {', '.join(str(len(f)) for f in fold_sets)} queries, "
+                  f"{len(blind_folds)} held out", file=sys.stderr)
+    elif holdout > 0:
         train_set, test_set = split_eval_set(eval_set, holdout)
         if verbose:
             print(f"Split: {len(train_set)} train, {len(test_set)} test (holdout={holdout})", file=sys.stderr)
@@ -73,192 +289,604 @@ def run_loop(
         train_set = eval_set
         test_set = []
 
+    splits = {"train_set": train_set, "test_set": test_set, "fold_sets": fold_sets, "blind_folds": blind_folds}
     history = []
     exit_reason = "unknown"
-
-    for iteration in range(1, max_iterations + 1):
-        if verbose:
-            print(f"\n{'='*60}", file=sys.stderr)
-            print(f"Iteration {iteration}/{max_iterations}", file=sys.stderr)
-            print(f"Description: {current_description}", file=sys.stderr)
-            print(f"{'='*60}", file=sys.stderr)
-
-        # Evaluate train + test together in one batch for parallelism
-        all_queries = train_set + test_set
+    concurrency = AIMDController(num_workers) if adaptive_concurrency else None
+    # Probe times from each iteration order the next one's queue, longest first
+    if latency_hints is None:
+        latency_hints = LatencyHints()
+    # Runs per query for this iteration's evaluations; a budget may lower it
+    eval_runs = runs_per_query
+    # One set of probe workers for every evaluation, however many run at once
+    owns_executor = executor is None
+    if owns_executor:
+        executor = make_executor(engine, num_workers)
+    # Proposals the lexical pre-screen kept from being evaluated
+    screened_out: list[dict] = []
+
+    def evaluate(description: str, queries: list[dict], pool: SandboxPool | None) -> tuple[dict, float]:
         t0 = time.time()
         all_results = run_eval(
-            eval_set=all_queries,
+            eval_set=queries,
             skill_name=name,
-            description=current_description,
+            description=description,
             num_workers=num_workers,
             timeout=timeout,
             project_root=project_root,
-            runs_per_query=runs_per_query,
+            runs_per_query=eval_runs,
             trigger_threshold=trigger_threshold,
             model=model,
+            cache=cache,
+            early_stop=early_stop,
+            engine=engine,
+            sandboxes=pool,
+            concurrency=concurrency,
+            max_retries=max_retries,
+            latency_hints=latency_hints,
+            executor=executor,
+        )
+        return all_results, time.time() - t0
+
+    def evaluate_all(jobs: list[tuple[str, list[dict]]]) -> list[tuple[dict, float]]:
+        """Evaluate (description, queries) jobs concurrently, all drawing on one sandbox pool."""
+        if len(jobs) == 1:
+            return [evaluate(*jobs[0], sandboxes)]
+        with ExitStack() as stack:
+            pool = sandboxes or stack.enter_context(SandboxPool(num_workers, project_root=project_root))
+            with ThreadPoolExecutor(max_workers=len(jobs)) as threads:
+                return list(threads.map(lambda job: evaluate(*job, pool), jobs))
+
+    def race_and_complete(iteration: int, descriptions: list[str]) -> tuple[list[int], list[tuple[dict, float]], dict]:
+        """Race candidates on train, then finish evaluating the survivors on train + test.
+
+        Returns the surviving indices, their merged (all_results, elapsed)
+        and the race record for history.
+        """
+        t0 = time.time()
+        race = race_candidates(
+            descriptions,
+            train_set,
+            evaluate_many=lambda jobs: [all_results["results"] for all_results, _ in evaluate_all(jobs)],
+            keep=beam_width,
+            runs_per_query=eval_runs,
+            seed=iteration,
         )
-        eval_elapsed = time.time() - t0
-
-        # Split results back into train/test by matching queries
-        train_queries_set = {q["query"] for q in train_set}
-        train_result_list = [r for r in all_results["results"] if r["query"] in train_queries_set]
-        test_result_list = [r for r in all_results["results"] if r["query"] not in train_queries_set]
-
-        train_passed = sum(1 for r in train_result_list if r["pass"])
-        train_total = len(train_result_list)
-        train_summary = {"passed": train_passed, "failed": train_total - train_passed, "total": train_total}
-        train_results = {"results": train_result_list, "summary": train_summary}
-
-        if test_set:
-            test_passed = sum(1 for r in test_result_list if r["pass"])
-            test_total = len(test_result_list)
-            test_summary = {"passed": test_passed, "failed": test_total - test_passed, "total": test_total}
-            test_results = {"results": test_result_list, "summary": test_summary}
+        race_elapsed = time.time() - t0
+        survivors = race["survivors"]
+        jobs = []
+        for i in survivors:
+            seen = {r["query"] for r in race["results"][i]}
+            jobs.append((descriptions[i], [q for q in train_set + test_set if q["query"] not in seen]))
+        merged = []
+        for i, (all_results, elapsed) in zip(survivors, evaluate_all(jobs)):
+            raced = race["results"][i]
+            results = raced + all_results["results"]
+            summary = dict(all_results["summary"])
+            # Race probes count too, so the budget is charged for them
+            summary["latency"] = latency_summary([p for r in results for p in r["probes"]])
+            summary["usage"] = sum_usage([summary["usage"]] + [r["usage"] for r in raced])
+            merged.append(({"results": results, "summary": summary}, race_elapsed + elapsed))
+        for rung in race["log"]:
+            for standing in rung["standings"]:
+                standing["candidate"] = f"{iteration}.{standing['candidate']}"
+        record = {
+            "log": race["log"],
+            "runs_used": race["runs_used"],
+            "full_runs": race["full_runs"],
+            "elapsed": round(race_elapsed, 2),
+            # Survivors' race runs are counted in their own eval_usage
+            "eliminated_usage": sum_usage([
+                r["usage"] for i, results in race["results"].items() if i not in survivors for r in results
+            ]),
+        }
+        return survivors, merged, record
+
+    def propose(
+        iteration: int, beam: list[dict], history: list[dict], count: int = candidates,
+    ) -> tuple[list[str], float, dict]:
+        """Ask for the next description(s) from the beam; return them, the time
+        taken and the improver's summed token usage.
+        """
+        t0 = time.time()
+        if fold_sets:
+            # Hide the held-out folds from every result shown, so every
+            # proposal is scored on them out of sample
+            hidden = {item["query"] for item in test_set}
+            blinded_history = [blind_entry(h, hidden) for h in history]
+            parents = [blind_entry(parent, hidden) for parent in beam]
         else:
-            test_results = None
-            test_summary = None
-
-        history.append({
+            # Strip test scores from history so improvement model can't see them
+            blinded_history = [
+                {k: v for k, v in h.items() if not k.startswith("test_")}
+                for h in history
+            ]
+            parents = beam
+
+        def improve(i: int) -> tuple[str, dict]:
+            parent = parents[i % len(parents)]
+            train_results = {
+                "results": parent["train_results"],
+                "summary": _summarize(parent["train_results"]),
+            }
+            return improve_description(
+                skill_name=name,
+                skill_content=content,
+                current_description=parent["description"],
+                eval_results=train_results,
+                history=blinded_history,
+                model=model,
+                log_dir=log_dir,
+                iteration=iteration,
+                approach=CANDIDATE_APPROACHES[i % len(CANDIDATE_APPROACHES)] if candidates > 1 else None,
+                candidate=i if beam_mode else None,
+                history_token_budget=history_token_budget,
+                response_cache=response_cache,
+            )
+
+        if count > 1:
+            with ThreadPoolExecutor(max_workers=count) as threads:
+                improved = list(threads.map(improve, range(count)))
+        else:
+            improved = [improve(0)]
+        return [d for d, _ in improved], time.time() - t0, sum_usage([u for _, u in improved])
+
+    pipelined = pipeline and bool(test_set) and not beam_mode
+    improver = ThreadPoolExecutor(max_workers=1) if pipelined else None
+
+    # (description, parent candidate label) pairs to evaluate this iteration
+    pending = [(current_description, None)]
+    beam: list[dict] = []
+    iterations_run = 0
+    first_iteration = 1
+    resumed_entries = None
+    if resume is not None:
+        history = resume["history"]
+        beam = [history[i] for i in resume["beam"]]
+        pending = [tuple(p) for p in resume["pending"]]
+        current_description = resume["current_description"]
+        exit_reason = resume["exit_reason"]
+        iterations_run = resume["iteration"]
+        screened_out = resume.get("screened_out", [])
+        # Probes already spent count against the limits
+        budget.charge_eval(sum(h["eval_latency"]["probes"] for h in history), total_usage(history), None)
+        if resume["phase"] == "evaluated":
+            first_iteration = resume["iteration"]
+            resumed_entries = [h for h in history if h["iteration"] == first_iteration]
+        else:
+            first_iteration = resume["iteration"] + 1
+
+    def fit_budget(count: int, improve: bool) -> tuple[int, int, str | None]:
+        """Largest (candidates, runs per query) up to (count, runs_per_query) that
+        the budget can afford for one evaluation, preferring full runs; (0, 0,
+        limit) if not even one candidate at one run fits.
+        """
+        queries = len(train_set) + len(test_set)
+        for runs in range(runs_per_query, 0, -1):
+            for n in range(count, 0, -1):
+                if budget.shortfall(n * queries * runs, improve_calls=n if improve else 0) is None:
+                    return n, runs, None
+        return 0, 0, budget.shortfall(queries, improve_calls=1 if improve else 0)
+
+    def checkpoint(phase: str, iteration: int) -> None:
+        """Save the state a resumed run needs to pick up after this step."""
+        if checkpoint_path is None:
+            return
+        save_checkpoint(checkpoint_path, {
+            "phase": phase,
             "iteration": iteration,
-            "description": current_description,
-            "train_passed": train_summary["passed"],
-            "train_failed": train_summary["failed"],
-            "train_total": train_summary["total"],
-            "train_results": train_results["results"],
-            "test_passed": test_summary["passed"] if test_summary else None,
-            "test_failed": test_summary["failed"] if test_summary else None,
-            "test_total": test_summary["total"] if test_summary else None,
-            "test_results": test_results["results"] if test_results else None,
-            # For backward compat with report generator
-            "passed": train_summary["passed"],
-            "failed": train_summary["failed"],
-            "total": train_summary["total"],
-            "results": train_results["results"],
+            "eval_set": eval_set,
+            "splits": splits,
+            "history": history,
+            "beam": [next(i for i, h in enumerate(history) if h is entry) for entry in beam],
+            "pending": [list(p) for p in pending],
+            "current_description": current_description,
+            "exit_reason": exit_reason,
+            "screened_out": screened_out,
         })
 
-        # Write live report if path provided
-        if live_report_path:
-            partial_output = {
-                "original_description": original_description,
-                "best_description": current_description,
-                "best_score": "in progress",
-                "iterations_run": len(history),
-                "holdout": holdout,
-                "train_size": len(train_set),
-                "test_size": len(test_set),
-                "history": history,
-            }
-            live_report_path.write_text(generate_html(partial_output, auto_refresh=True, skill_name=name))
-
+    def prescreen_correlation() -> tuple[float | None, int]:
+        """Correlation of predicted with actual train pass rates so far, and over how many entries."""
+        screened = [h["prescreen"] for h in history if h.get("prescreen")]
+        return pearson([p["predicted"] for p in screened], [p["actual"] for p in screened]), len(screened)
+
+    def score(entry: dict) -> tuple:
+        """Selection key: mean over the held-out folds, then over all folds, then train score."""
+        if fold_sets:
+            return entry["cv"]["held_out"], entry["cv"]["mean"], entry["train_passed"]
+        return (entry["train_passed"],)
+
+    for iteration in range(first_iteration, max_iterations + 1):
+        iterations_run = iteration
+        iteration_t0 = time.time()
+        proposals_future = None
         if verbose:
-            def print_eval_stats(label, results, elapsed):
-                pos = [r for r in results if r["should_trigger"]]
-                neg = [r for r in results if not r["should_trigger"]]
-                tp = sum(r["triggers"] for r in pos)
-                pos_runs = sum(r["runs"] for r in pos)
-                fn = pos_runs - tp
-                fp = sum(r["triggers"] for r in neg)
-                neg_runs = sum(r["runs"] for r in neg)
-                tn = neg_runs - fp
-                total = tp + tn + fp + fn
-                precision = tp / (tp + fp) if (tp + fp) > 0 else 1.0
-                recall = tp / (tp + fn) if (tp + fn) > 0 else 1.0
-                accuracy = (tp + tn) / total if total > 0 else 0.0
-                print(f"{label}: {tp+tn}/{total} correct, precision={precision:.0%} recall={recall:.0%} accuracy={accuracy:.0%} ({elapsed:.1f}s)", file=sys.stderr)
-                for r in results:
-                    status = "PASS" if r["pass"] else "FAIL"
-                    rate_str = f"{r['triggers']}/{r['runs']}"
-                    print(f"  [{status}] rate={rate_str} expected={r['should_trigger']}: {r['query'][:60]}", file=sys.stderr)
-
-            print_eval_stats("Train", train_results["results"], eval_elapsed)
-            if test_summary:
-                print_eval_stats("Test ", test_results["results"], 0)
-
-        if train_summary["failed"] == 0:
+            print(f"\n{'='*60}", file=sys.stderr)
+            print(f"Iteration {iteration}/{max_iterations}", file=sys.stderr)
+            for i, (description, _) in enumerate(pending):
+                label = f"Candidate {i}" if beam_mode else "Description"
+                print(f"{label}: {description}", file=sys.stderr)
+            print(f"{'='*60}", file=sys.stderr)
+
+        if resumed_entries is None and budget.limited:
+            fit, eval_runs, exhausted = fit_budget(len(pending), improve=False)
+            if not fit and not history:
+                # The baseline always runs, so there is a best to return
+                fit, eval_runs = 1, 1
+            elif not fit:
+                exit_reason = budget.exit_reason(exhausted)
+                if verbose:
+                    print(f"\nBudget exhausted before iteration {iteration}: {exit_reason}", file=sys.stderr)
+                break
+            if verbose and (fit < len(pending) or eval_runs < runs_per_query):
+                print(f"Budget: evaluating {fit}/{len(pending)} candidates at {eval_runs}/{runs_per_query} runs per query", file=sys.stderr)
+            pending = pending[:fit]
+
+        if resumed_entries is not None:
+            # Evaluated before the interruption; carry on from the stop checks
+            entries, resumed_entries = resumed_entries, None
+        else:
+            eval_t0 = time.time()
+            race_record = None
+            if pipelined:
+                description = pending[0][0]
+                # Train and test share the pool as one batch would; only the
+                # improver waits for train alone
+                with ExitStack() as stack:
+                    pool = sandboxes or stack.enter_context(SandboxPool(num_workers, project_root=project_root))
+                    with ThreadPoolExecutor(max_workers=2) as threads:
+                        train_future = threads.submit(evaluate, description, train_set, pool)
+                        test_future = threads.submit(evaluate, description, test_set, pool)
+                        train_output, train_elapsed = train_future.result()
+                        provisional = history_entry(iteration, description, train_output, train_set, [], train_elapsed)
+                        if provisional["train_failed"] and iteration < max_iterations:
+                            if verbose:
+                                print("Train done; improving description while test queries run...", file=sys.stderr)
+                            proposals_future = improver.submit(propose, iteration, [provisional], history + [provisional])
+                        test_output, _ = test_future.result()
+                indices = [0]
+                evaluated = [(merge_eval_outputs(train_output, test_output), time.time() - eval_t0)]
+            elif race and len(pending) > 1:
+                indices, evaluated, race_record = race_and_complete(iteration, [d for d, _ in pending])
+            elif fold_sets:
+                # One job per (candidate, fold), all in flight together
+                indices = list(range(len(pending)))
+                outputs = evaluate_all([(description, fold) for description, _ in pending for fold in fold_sets])
+                evaluated = []
+                for i in indices:
+                    per_fold = outputs[i * len(fold_sets):(i + 1) * len(fold_sets)]
+                    merged = per_fold[0][0]
+                    for output, _ in per_fold[1:]:
+                        merged = merge_eval_outputs(merged, output)
+                    evaluated.append((merged, max(elapsed for _, elapsed in per_fold)))
+            else:
+                indices = list(range(len(pending)))
+                evaluated = evaluate_all([(description, train_set + test_set) for description, _ in pending])
+            entries = []
+            for i, (all_results, eval_elapsed) in zip(indices, evaluated):
+                description, parent = pending[i]
+                latency_hints.update(all_results["results"])
+                entry = history_entry(iteration, description, all_results, train_set, test_set, eval_elapsed)
+                if beam_mode:
+                    entry["candidate"] = f"{iteration}.{i}"
+                    entry["parent"] = parent
+                if race_record is not None:
+                    entry["race"] = race_record
+                if fold_sets:
+                    entry["cv"] = cv_summary(all_results["results"], fold_sets, blind_folds)
+                entries.append(entry)
+            if prescreen:
+                screen = LexicalScreen(train_set, competitors)
+                for entry, predicted in zip(entries, screen.predict([e["description"] for e in entries])):
+                    entry["prescreen"] = {
+                        "predicted": predicted,
+                        "actual": round(entry["train_passed"] / entry["train_total"], 4) if entry["train_total"] else 0.0,
+                        "query_correlation": screen.query_correlation(entry["description"], entry["train_results"]),
+                    }
+            latency_hints.save()
+            budget.charge_eval(
+                sum(entry["eval_latency"]["probes"] for entry in entries)
+                + (race_record["eliminated_usage"]["probes"] if race_record else 0),
+                sum_usage([entry["eval_usage"] for entry in entries]
+                          + ([race_record["eliminated_usage"]] if race_record else [])),
+                time.time() - eval_t0,
+            )
+            if verbose and race_record is not None:
+                for rung in race_record["log"]:
+                    standings = ", ".join(
+                        f"{st['candidate']}={st['passed']}/{st['evaluated']}{' x' if st['eliminated'] else ''}"
+                        for st in rung["standings"]
+                    )
+                    print(f"Race rung {rung['rung']} ({rung['queries']} queries): {standings}", file=sys.stderr)
+                print(f"Race: {race_record['runs_used']} runs instead of {race_record['full_runs']}", file=sys.stderr)
+            history.extend(entries)
+
+            # Write live report if path provided
+            if live_report_path:
+                partial_output = {
+                    "original_description": original_description,
+                    "best_description": current_description,
+                    "best_score": "in progress",
+                    "iterations_run": iterations_run,
+                    "holdout": holdout,
+                    "train_size": len(train_set),
+                    "test_size": len(test_set),
+                    "history": history,
+                }
+                live_report_path.write_text(generate_html(partial_output, auto_refresh=True, skill_name=name))
+
+            if verbose:
+                for entry, (all_results, eval_elapsed) in zip(entries, evaluated):
+                    label = f" {entry['candidate']}" if beam_mode else ""
+                    print_eval_stats(f"Train{label}", entry["train_results"], eval_elapsed)
+                    if test_set:
+                        print_eval_stats(f"Test {label}", entry["test_results"], 0)
+                    if "cache" in all_results["summary"]:
+                        cache_stats = all_results["summary"]["cache"]
+                        print(f"Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses", file=sys.stderr)
+                    if "early_stop" in all_results["summary"]:
+                        print(f"Early stop: {all_results['summary']['early_stop']['runs_saved']} runs saved", file=sys.stderr)
+                    latency = all_results["summary"]["latency"]
+                    if latency["decision_s"]:
+                        print(f"Latency: decision p50={latency['decision_s']['p50']}s p99={latency['decision_s']['p99']}s, {latency['late_detections']} late detections, {latency['timeouts']} timeouts", file=sys.stderr)
+                    usage = all_results["summary"]["usage"]
+                    print(f"Usage: ${usage['cost_usd']:.4f} over {usage['probes']} probes "
+                          f"({usage['estimated_probes']} estimated)", file=sys.stderr)
+                    schedule = all_results["summary"]["schedule"]
+                    print(f"Schedule: {schedule['order']}, tail idle {schedule['tail_idle_slot_s']} worker-seconds "
+                          f"over the last {schedule['tail_s']}s", file=sys.stderr)
+                    errors = all_results["summary"]["errors"]
+                    if errors["failed_attempts"]:
+                        print(f"Errors: {errors['failed_attempts']} failed attempts ({errors['timeouts']} timeouts), {errors['errored_runs']} runs errored", file=sys.stderr)
+                if concurrency is not None:
+                    print(f"Concurrency: limit {concurrency.limit}/{num_workers}", file=sys.stderr)
+                if prescreen:
+                    correlation, pairs = prescreen_correlation()
+                    predictions = ", ".join(
+                        f"{e['prescreen']['predicted']:.2f}/{e['prescreen']['actual']:.2f}" for e in entries
+                    )
+                    print(f"Pre-screen: predicted/actual {predictions}; r={correlation} over {pairs} descriptions so far",
+                          file=sys.stderr)
+
+            # The beam: parents for the next round. Outside beam mode it is just
+            # the latest description, as the loop has always worked.
+            if beam_mode:
+                beam = sorted(beam + entries, key=score, reverse=True)[:beam_width]
+            else:
+                beam = entries
+            current_description = beam[0]["description"]
+            checkpoint("evaluated", iteration)
+
+        def stamp_wall(improve_elapsed: float | None = None) -> None:
+            for entry in entries:
+                entry["iteration_wall_s"] = round(time.time() - iteration_t0, 2)
+                if improve_elapsed is not None:
+                    entry["improve_elapsed"] = round(improve_elapsed, 2)
+                    if pipelined:
+                        # The same iteration with the improver waiting for test too
+                        entry["sequential_wall_s"] = round(entry["eval_elapsed"] + improve_elapsed, 2)
+
+        if any(entry["train_failed"] == 0 for entry in entries):
+            stamp_wall()
             exit_reason = f"all_passed (iteration {iteration})"
             if verbose:
                 print(f"\nAll train queries passed on iteration {iteration}!", file=sys.stderr)
             break
 
         if iteration == max_iterations:
+            stamp_wall()
             exit_reason = f"max_iterations ({max_iterations})"
             if verbose:
                 print(f"\nMax iterations reached ({max_iterations}).", file=sys.stderr)
             break
 
-        # Improve the description based on train results
-        if verbose:
-            print(f"\nImproving description...", file=sys.stderr)
+        # Only improve if the budget can also pay to evaluate the result
+        count = candidates
+        if budget.limited:
+            count, _, exhausted = fit_budget(candidates, improve=proposals_future is None)
+            if not count:
+                stamp_wall()
+                exit_reason = budget.exit_reason(exhausted)
+                if verbose:
+                    print(f"\nBudget exhausted after iteration {iteration}: {exit_reason}", file=sys.stderr)
+                break
 
-        t0 = time.time()
-        # Strip test scores from history so improvement model can't see them
-        blinded_history = [
-            {k: v for k, v in h.items() if not k.startswith("test_")}
-            for h in history
-        ]
-        new_description = improve_description(
-            skill_name=name,
-            skill_content=content,
-            current_description=current_description,
-            eval_results=train_results,
-            history=blinded_history,
-            model=model,
-            log_dir=log_dir,
-            iteration=iteration,
-        )
-        improve_elapsed = time.time() - t0
+        # Improve the description based on train results
+        if proposals_future is not None:
+            proposals, improve_elapsed, improve_usage = proposals_future.result()
+        else:
+            if verbose:
+                print(f"\nImproving description{'s' if count > 1 else ''}...", file=sys.stderr)
+            proposals, improve_elapsed, improve_usage = propose(iteration, beam, history, count)
+        budget.charge_improve(len(proposals), improve_elapsed, improve_usage)
+        stamp_wall(improve_elapsed)
 
         if verbose:
-            print(f"Proposed ({improve_elapsed:.1f}s): {new_description}", file=sys.stderr)
-
-        current_description = new_description
+            for proposal in proposals:
+                print(f"Proposed ({improve_elapsed:.1f}s): {proposal}", file=sys.stderr)
 
-    # Find the best iteration by TEST score (or train if no test set)
-    if test_set:
+        pending = [
+            (proposal, beam[i % len(beam)].get("candidate")) for i, proposal in enumerate(proposals)
+        ]
+        if prescreen:
+            # Screen on the queries the improver saw, not the held-out ones
+            screen = LexicalScreen(train_set, competitors)
+            parent_predicted = screen.predict([parent["description"] for parent in beam])
+            kept, predicted = screen_candidates(
+                screen, proposals, [parent_predicted[i % len(beam)] for i in range(len(proposals))], prescreen_margin,
+            )
+            for i in range(len(proposals)):
+                if i not in kept:
+                    screened_out.append({
+                        "iteration": iteration + 1,
+                        "description": proposals[i],
+                        "parent": pending[i][1],
+                        "predicted": predicted[i],
+                        "parent_predicted": parent_predicted[i % len(beam)],
+                    })
+                    if verbose:
+                        print(f"Pre-screen: dropped proposal {i} (predicted {predicted[i]:.2f} vs parent "
+                              f"{parent_predicted[i % len(beam)]:.2f})", file=sys.stderr)
+            pending = [pending[i] for i in kept]
+            proposals = [proposals[i] for i in kept]
+        if not beam_mode:
+            current_description = proposals[0]
+        checkpoint("improved", iteration)
+
+    if improver is not None:
+        improver.shutdown()
+    if owns_executor:
+        executor.shutdown()
+    # Final state: resuming it (say with a higher --max-iterations) starts
+    # from the stop checks of the last iteration
+    if history:
+        checkpoint("evaluated", history[-1]["iteration"])
+
+    # Find the best iteration by cross-validated score, else TEST score (or
+    # train if no test set)
+    if fold_sets:
+        best = max(history, key=score)
+        best_score = (f"held-out {best['cv']['held_out']:.0%} over {len(blind_folds)} folds, "
+                      f"cv {best['cv']['mean']:.0%} ± {best['cv']['std']:.0%} over {len(fold_sets)} folds")
+    elif test_set:
         best = max(history, key=lambda h: h["test_passed"] or 0)
         best_score = f"{best['test_passed']}/{best['test_total']}"
     else:
         best = max(history, key=lambda h: h["train_passed"])
         best_score = f"{best['train_passed']}/{best['train_total']}"
+    pipelined_entries = [h for h in history if h.get("sequential_wall_s") is not None]
 
     if verbose:
         print(f"\nExit reason: {exit_reason}", file=sys.stderr)
-        print(f"Best score: {best_score} (iteration {best['iteration']})", file=sys.stderr)
-
+        print(f"Best score: {best_score} (iteration {best.get('candidate', best['iteration'])})", file=sys.stderr)
+        usage = total_usage(history)
+        print(f"Eval cost: ${usage['cost_usd']:.4f} over {usage['probes']} probes", file=sys.stderr)
+        if pipelined_entries:
+            print(f"Pipelining: {sum(h['iteration_wall_s'] for h in pipelined_entries):.1f}s over improved iterations, "
+                  f"vs {sum(h['sequential_wall_s'] for h in pipelined_entries):.1f}s unpipelined", file=sys.stderr)
+
+    correlation, screened = prescreen_correlation()
     return {
         "exit_reason": exit_reason,
         "original_description": original_description,
         "best_description": best["description"],
+        "best_index": next(i for i, h in enumerate(history) if h is best),
         "best_score": best_score,
         "best_train_score": f"{best['train_passed']}/{best['train_total']}",
         "best_test_score": f"{best['test_passed']}/{best['test_total']}" if test_set else None,
         "final_description": current_description,
-        "iterations_run": len(history),
+        "iterations_run": iterations_run,
         "holdout": holdout,
         "train_size": len(train_set),
         "test_size": len(test_set),
         "history": history,
+        "concurrency": concurrency.summary() if concurrency is not None else None,
+        "usage": total_usage(history),
+        "beam": {"candidates": candidates, "beam_width": beam_width, "race": race} if beam_mode else None,
+        "folds": len(fold_sets) or None,
+        "best_cv": best.get("cv"),
+        "budget": budget.summary() if budget.limited else None,
+        "pipeline": {
+            "wall_s": round(sum(h["iteration_wall_s"] for h in pipelined_entries), 2),
+            "sequential_wall_s": round(sum(h["sequential_wall_s"] for h in pipelined_entries), 2),
+        } if pipelined_entries else None,
+        "prescreen": {
+            "margin": prescreen_margin,
+            "competitors": len(competitors or []),
+            "correlation": correlation,
+            "descriptions": screened,
+            "screened_out": screened_out,
+        } if prescreen else None,
     }
 
 
 def main():
     parser = argparse.ArgumentParser(description="Run eval + improve loop")
-    parser.add_argument("--eval-set", required=True, help="Path to eval set JSON file")
-    parser.add_argument("--skill-path", required=True, help="Path to skill directory")
+    parser.add_argument("--eval-set", default=None, help="Path to eval set JSON file")
+    parser.add_argument("--skill-path", default=None, help="Path to skill directory")
     parser.add_argument("--description", default=None, help="Override starting description")
     parser.add_argument("--num-workers", type=int, default=10, help="Number of parallel workers")
     parser.add_argument("--timeout", type=int, default=30, help="Timeout per query in seconds")
-    parser.add_argument("--max-iterations", type=int, default=5, help="Max improvement iterations")
+    parser.add_argument("--max-iterations", type=int, default=None,
+                        help="Max improvement iterations (default 5; with --resume, the interrupted run's)")
     parser.add_argument("--runs-per-query", type=int, default=3, help="Number of runs per query")
     parser.add_argument("--trigger-threshold", type=float, default=0.5, help="Trigger rate threshold")
+    parser.add_argument("--early-stop", choices=["bound", "sprt"], default=None,
+                        help="Stop scheduling runs for a query once its pass/fail is settled (see run_eval.py)")
+    parser.add_argument("--engine", choices=["pool", "asyncio", "warm"], default="pool",
+                        help="How run_eval drives claude -p probes (see run_eval.py)")
+    parser.add_argument("--adaptive-concurrency", action="store_true",
+                        help="Treat --num-workers as a ceiling and adapt in-flight probes to latency and failures")
+    parser.add_argument("--max-retries", type=int, default=2, help="Retries for a probe that times out or errors")
+    parser.add_argument("--candidates", type=int, default=1,
+                        help="Beam search: improved descriptions to generate (each with a different approach hint) "
+                        "and evaluate in parallel per iteration")
+    parser.add_argument("--beam-width", type=int, default=1,
+                        help="Beam search: best descriptions, among new candidates and the surviving beam, kept as parents")
+    parser.add_argument("--race", action="store_true",
+                        help="Beam search: race candidates by successive halving on the train set before full evaluation")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Evaluate train and test concurrently and start each improvement as soon as train results are in "
+                        "(single chain with a test set)")
+    parser.add_argument("--folds", type=int, default=0,
+                        help="Split into k stratified folds (k > 1) and hold out --holdout of them for the whole run: "
+                        "candidates are selected on their mean over those, then the cross-validated mean")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="Stop before starting work that would run past this many seconds (candidates, then runs per query, "
+                        "are cut to fit first)")
+    parser.add_argument("--max-cli-calls", type=int, default=None,
+                        help="Stop before exceeding this many claude -p calls (eval probes plus improvements)")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="Stop before eval probes and improvements would use more than this many tokens")
+    parser.add_argument("--history-token-budget", type=int, default=DEFAULT_HISTORY_TOKEN_BUDGET,
+                        help="Summarize previous attempts in improvement prompts to about this many tokens (0 for no limit)")
+    parser.add_argument("--prescreen", action="store_true",
+                        help="Rank proposals by offline lexical match with the train queries and skip hopeless ones before evaluating")
+    parser.add_argument("--competing-skills", default=None,
+                        help="With --prescreen, a skills root whose other skills' descriptions compete for the queries")
+    parser.add_argument("--prescreen-margin", type=float, default=DEFAULT_MARGIN,
+                        help="With --prescreen, skip proposals predicted this far below their parent")
     parser.add_argument("--holdout", type=float, default=0.4, help="Fraction of eval set to hold out for testing (0 to disable)")
-    parser.add_argument("--model", required=True, help="Model for improvement")
+    parser.add_argument("--model", default=None, help="Model for improvement")
     parser.add_argument("--verbose", action="store_true", help="Print progress to stderr")
     parser.add_argument("--report", default="auto", help="Generate HTML report at this path (default: 'auto' for temp file, 'none' to disable)")
     parser.add_argument("--results-dir", default=None, help="Save all outputs (results.json, report.html, log.txt) to a timestamped subdirectory here")
+    parser.add_argument("--no-cache", action="store_true", help="Don't reuse trigger outcomes cached under --results-dir")
+    parser.add_argument("--improver-cache", action="store_true",
+                        help="Reuse improve_description responses to identical prompts, cached under --results-dir")
+    parser.add_argument("--bypass-improver-cache", action="store_true",
+                        help="With --improver-cache, call the model anyway and overwrite the cached responses")
+    parser.add_argument("--resume", default=None,
+                        help="Continue an interrupted run from its timestamped results directory, with the same settings and splits")
     args = parser.parse_args()
 
-    eval_set = json.loads(Path(args.eval_set).read_text())
+    resume = None
+    if args.resume:
+        resume_dir = Path(args.resume)
+        if not (resume_dir / "checkpoint.json").exists():
+            print(f"Error: No checkpoint.json found in {resume_dir}", file=sys.stderr)
+            sys.exit(1)
+        resume = json.loads((resume_dir / "checkpoint.json").read_text())
+        saved_args = json.loads((resume_dir / "args.json").read_text())
+        # Everything but the iteration limit and verbosity comes from the
+        # original run; defaults fill in options added since it was saved
+        args = argparse.Namespace(**{
+            **vars(args),
+            **saved_args,
+            "resume": args.resume,
+            "max_iterations": args.max_iterations or saved_args["max_iterations"],
+            "verbose": args.verbose or saved_args["verbose"],
+        })
+        eval_set = resume["eval_set"]
+    else:
+        missing = [flag for flag, value in (("--eval-set", args.eval_set), ("--skill-path", args.skill_path), ("--model", args.model)) if not value]
+        if missing:
+            parser.error(f"the following arguments are required: {', '.join(missing)}")
+        if args.max_iterations is None:
+            args.max_iterations = 5
+        if args.improver_cache and not args.results_dir:
+            parser.error("--improver-cache needs --results-dir")
+        eval_set = json.loads(Path(args.eval_set).read_text())
     skill_path = Path(args.skill_path)
 
     if not (skill_path / "SKILL.md").exists():
@@ -281,30 +909,69 @@ def main():
         live_report_path = None
 
     # Determine output directory (create before run_loop so logs can be written)
-    if args.results_dir:
+    if args.resume:
+        # Keep writing into the interrupted run's directory
+        results_dir = Path(args.resume)
+        args.results_dir = str(results_dir.parent)
+    elif args.results_dir:
         timestamp = time.strftime("%Y-%m-%d_%H%M%S")
         results_dir = Path(args.results_dir) / timestamp
         results_dir.mkdir(parents=True, exist_ok=True)
+        (results_dir / "args.json").write_text(json.dumps(vars(args), indent=2))
     else:
         results_dir = None
 
     log_dir = results_dir / "logs" if results_dir else None
 
-    output = run_loop(
-        eval_set=eval_set,
-        skill_path=skill_path,
-        description_override=args.description,
-        num_workers=args.num_workers,
-        timeout=args.timeout,
-        max_iterations=args.max_iterations,
-        runs_per_query=args.runs_per_query,
-        trigger_threshold=args.trigger_threshold,
-        holdout=args.holdout,
-        model=args.model,
-        verbose=args.verbose,
-        live_report_path=live_report_path,
-        log_dir=log_dir,
-    )
+    # The trigger cache lives beside the timestamped runs so restarts share it
+    cache = None
+    if args.results_dir and not args.no_cache:
+        cache = TriggerCache(Path(args.results_dir) / "trigger_cache")
+
+    response_cache = None
+    if args.improver_cache:
+        response_cache = ResponseCache(Path(args.results_dir) / "improver_cache", bypass=args.bypass_improver_cache)
+
+    latency_hints = LatencyHints(Path(args.results_dir) / "latency_hints.json" if args.results_dir else None)
+
+    with SandboxPool(args.num_workers, project_root=find_project_root()) as sandboxes, \
+            make_executor(args.engine, args.num_workers) as executor:
+        output = run_loop(
+            eval_set=eval_set,
+            skill_path=skill_path,
+            description_override=args.description,
+            num_workers=args.num_workers,
+            timeout=args.timeout,
+            max_iterations=args.max_iterations,
+            runs_per_query=args.runs_per_query,
+            trigger_threshold=args.trigger_threshold,
+            holdout=args.holdout,
+            model=args.model,
+            verbose=args.verbose,
+            live_report_path=live_report_path,
+            log_dir=log_dir,
+            cache=cache,
+            early_stop=args.early_stop,
+            engine=args.engine,
+            sandboxes=sandboxes,
+            adaptive_concurrency=args.adaptive_concurrency,
+            max_retries=args.max_retries,
+            latency_hints=latency_hints,
+            candidates=args.candidates,
+            beam_width=args.beam_width,
+            race=args.race,
+            pipeline=args.pipeline,
+            folds=args.folds,
+            checkpoint_path=results_dir / "checkpoint.json" if results_dir else None,
+            resume=resume,
+            budget=Budget(args.time_budget, args.max_cli_calls, args.token_budget),
+            history_token_budget=args.history_token_budget or None,
+            response_cache=response_cache,
+            prescreen=args.prescreen,
+            competitors=competitor_descriptions(Path(args.competing_skills), skill_path) if args.competing_skills else None,
+            prescreen_margin=args.prescreen_margin,
+            executor=executor,
+        )
 
     # Save JSON output
     json_output = json.dumps(output, indent=2)
@@ -0,0 +1,176 @@
+"""Reusable sandbox project roots for trigger probes.
+
+Writing every probe's command file into the one shared
+`<project>/.claude/commands` means each of N concurrent `claude -p` processes
+scans, and can pick, up to N competing copies of the skill. Instead each
+worker slot gets its own project root holding exactly one command file,
+which is rewritten in place when the description under test changes.
+
+Sandboxes carry over the real project's CLAUDE.md and .claude settings so the
+model sees the same project context, but none of its other commands.
+
+A SandboxPool may be shared by several run_eval calls running in threads
+(e.g. candidates evaluated side by side); leasing is locked, and callers that
+find it empty can wait for a release.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+
+# Files copied from the real project root into every sandbox.
+SEEDED_FILES = ("CLAUDE.md", ".claude/settings.json", ".claude/settings.local.json")
+
+
+def command_content(skill_name: str, description: str) -> str:
+    """Render the command file that stands in for the skill under test."""
+    # Use YAML block scalar to avoid breaking on quotes in description
+    indented_desc = "\n  ".join(description.split("\n"))
+    return (
+        f"---\n"
+        f"description: |\n"
+        f"  {indented_desc}\n"
+        f"---\n\n"
+        f"# {skill_name}\n\n"
+        f"This skill handles: {description}\n"
+    )
+
+
+class Sandbox:
+    """One project root with a single installed command file."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.commands_dir = root / ".claude" / "commands"
+        self.commands_dir.mkdir(parents=True, exist_ok=True)
+        self.skill_name: str | None = None
+        self.description: str | None = None
+        self.clean_name: str | None = None
+
+    @property
+    def command_file(self) -> Path:
+        return self.commands_dir / f"{self.clean_name}.md"
+
+    def install(self, skill_name: str, description: str) -> None:
+        """Make this sandbox's command file describe the given skill.
+
+        The file keeps its name while the skill stays the same and is only
+        rewritten (atomically) when the description changes.
+        """
+        if skill_name != self.skill_name:
+            if self.clean_name:
+                self.command_file.unlink(missing_ok=True)
+            self.skill_name = skill_name
+            self.clean_name = f"{skill_name}-skill-{uuid.uuid4().hex[:8]}"
+            self.description = None
+        if description == self.description:
+            return
+
+        tmp_file = self.root / ".command.tmp"
+        tmp_file.write_text(command_content(skill_name, description))
+        os.replace(tmp_file, self.command_file)
+        self.description = description
+
+    def install_set(self, commands: dict[str, tuple[str, str]]) -> None:
+        """Install several commands side by side, keyed by clean name.
+
+        Each value is a (skill_name, description) pair. For collision runs,
+        where every skill competes in the same project; the sandbox no longer
+        holds a single skill afterwards.
+        """
+        if self.clean_name:
+            self.command_file.unlink(missing_ok=True)
+        self.skill_name = self.description = self.clean_name = None
+        for clean_name, (skill_name, description) in commands.items():
+            tmp_file = self.root / ".command.tmp"
+            tmp_file.write_text(command_content(skill_name, description))
+            os.replace(tmp_file, self.commands_dir / f"{clean_name}.md")
+
+
+class SandboxPool:
+    """A fixed set of sandboxes leased out one per in-flight probe.
+
+    Leases prefer a free sandbox that already holds the requested
+    description, so interleaved callers testing different descriptions
+    rewrite command files as rarely as possible.
+    """
+
+    def __init__(self, size: int, project_root: Path | None = None, base_dir: Path | None = None):
+        self._base = Path(tempfile.mkdtemp(prefix="skill-eval-", dir=base_dir))
+        self._all: list[Sandbox] = []
+        for i in range(size):
+            root = self._base / f"slot-{i}"
+            root.mkdir()
+            if project_root is not None:
+                for rel in SEEDED_FILES:
+                    src = Path(project_root) / rel
+                    if src.is_file():
+                        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+                        shutil.copyfile(src, root / rel)
+            self._all.append(Sandbox(root))
+        self._free = list(reversed(self._all))
+        self._released = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        return len(self._all)
+
+    @property
+    def available(self) -> int:
+        return len(self._free)
+
+    def acquire(self, skill_name: str, description: str) -> Sandbox:
+        """Lease a free sandbox with the given skill installed."""
+        sandbox = self.try_acquire(skill_name, description)
+        if sandbox is None:
+            raise RuntimeError("No free sandbox; release one before acquiring another")
+        return sandbox
+
+    def try_acquire(self, skill_name: str, description: str) -> Sandbox | None:
+        """Lease a free sandbox with the given skill installed, or None if all are leased."""
+        with self._released:
+            if not self._free:
+                return None
+            index = next(
+                (i for i in range(len(self._free) - 1, -1, -1)
+                 if self._free[i].skill_name == skill_name and self._free[i].description == description),
+                len(self._free) - 1,
+            )
+            sandbox = self._free.pop(index)
+        sandbox.install(skill_name, description)
+        return sandbox
+
+    def install_set(self, commands: dict[str, tuple[str, str]]) -> None:
+        """Install the same commands in every sandbox (see Sandbox.install_set)."""
+        with self._released:
+            for sandbox in self._all:
+                sandbox.install_set(commands)
+
+    def lease(self) -> Sandbox:
+        """Lease a free sandbox as it is, without installing anything."""
+        with self._released:
+            if not self._free:
+                raise RuntimeError("No free sandbox; release one before acquiring another")
+            return self._free.pop()
+
+    def release(self, sandbox: Sandbox) -> None:
+        with self._released:
+            self._free.append(sandbox)
+            self._released.notify_all()
+
+    def wait_for_release(self, timeout: float | None = None) -> None:
+        """Block until a sandbox is free (or timeout seconds pass)."""
+        with self._released:
+            self._released.wait_for(lambda: self._free, timeout)
+
+    def close(self) -> None:
+        shutil.rmtree(self._base, ignore_errors=True)
+
+    def __enter__(self) -> "SandboxPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
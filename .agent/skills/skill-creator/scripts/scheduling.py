@@ -0,0 +1,99 @@
+"""Makespan-aware ordering of run_eval probes.
+
+Submitting probes in eval-set order lets slow queries (long prompts, ones
+that run tools before deciding) land last, so most workers sit idle while the
+final few finish. LatencyHints remembers how long each query's probes took in
+earlier iterations (optionally persisted as JSON between runs) so run_eval can
+start the longest-expected work first: retries are dispatched before further
+runs of ambiguous queries (mixed outcomes so far), and those before the rest,
+longest-expected first within each tier. TailIdleMeter measures what is left:
+worker-seconds spent idle because there was nothing queued to run.
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+class LatencyHints:
+    """Per-query expected probe wall time, learned from earlier run_eval results."""
+
+    def __init__(self, path: Path | None = None, alpha: float = 0.5):
+        self.path = Path(path) if path is not None else None
+        # Weight of the newest observation in the moving average
+        self.alpha = alpha
+        self.seconds: dict[str, float] = {}
+        if self.path is not None and self.path.exists():
+            try:
+                self.seconds = {q: float(s) for q, s in json.loads(self.path.read_text()).items()}
+            except (json.JSONDecodeError, OSError, AttributeError, TypeError, ValueError):
+                self.seconds = {}
+
+    def __len__(self) -> int:
+        return len(self.seconds)
+
+    def expected(self, query: str) -> float | None:
+        return self.seconds.get(query)
+
+    def default(self) -> float:
+        """Estimate for a query never seen before: the mean of the known ones."""
+        return sum(self.seconds.values()) / len(self.seconds) if self.seconds else 0.0
+
+    def update(self, results: list[dict]) -> None:
+        """Fold the probe wall times of run_eval results into the estimates."""
+        for r in results:
+            walls = [p["wall_s"] for p in r.get("probes", []) if p.get("wall_s") is not None]
+            if not walls:
+                continue
+            observed = sum(walls) / len(walls)
+            previous = self.seconds.get(r["query"])
+            if previous is None:
+                self.seconds[r["query"]] = round(observed, 3)
+            else:
+                self.seconds[r["query"]] = round(self.alpha * observed + (1 - self.alpha) * previous, 3)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_text(json.dumps(self.seconds, indent=2))
+        os.replace(tmp, self.path)
+
+
+class TailIdleMeter:
+    """Integrate idle worker capacity over the tail of a run.
+
+    The tail starts when the ready queue last drained for good; from then on
+    every free slot is idle for lack of work rather than by choice. Call
+    tick() at each scheduler wake-up with the in-flight count that held since
+    the previous tick.
+    """
+
+    def __init__(self, start: float):
+        self.start = start
+        self.tail_start: float | None = None
+        self.tail_idle = 0.0
+        self._last = start
+
+    def tick(self, now: float, in_flight: int, capacity: int, starving: bool) -> None:
+        if self.tail_start is not None:
+            self.tail_idle += max(capacity - in_flight, 0) * (now - self._last)
+        if starving:
+            if self.tail_start is None:
+                self.tail_start = now
+        else:
+            # More work showed up (a retry, another run): not the tail after all
+            self.tail_start = None
+            self.tail_idle = 0.0
+        self._last = now
+
+    def summary(self, end: float, capacity: int) -> dict:
+        wall = end - self.start
+        tail = end - self.tail_start if self.tail_start is not None else 0.0
+        return {
+            "wall_s": round(wall, 2),
+            "tail_s": round(tail, 2),
+            "tail_idle_slot_s": round(self.tail_idle, 2),
+            "tail_idle_fraction": round(self.tail_idle / (capacity * wall), 3) if wall > 0 and capacity else 0.0,
+        }
@@ -0,0 +1,307 @@
+"""Incremental parsing of `claude -p --output-format stream-json` output.
+
+NDJSONReader turns raw stdout chunks into events without re-scanning or
+re-copying the unconsumed buffer on every line, and TriggerDetector is the
+state machine that decides from those events whether a probe triggered the
+skill under test. UsageMeter collects token usage and cost from the same
+events. All engines in run_eval share them.
+"""
+
+import json
+
+
+class NDJSONReader:
+    """Split a byte stream into JSON objects, one per line.
+
+    Chunks are appended to a bytearray and lines are parsed straight from
+    memoryview slices of it; the consumed prefix is dropped once per chunk,
+    so each byte is scanned and copied a constant number of times however
+    long the stream. Lines are split on raw bytes (0x0A never occurs inside a
+    multi-byte UTF-8 sequence) and handed to json.loads as bytes, so the
+    stream is never decoded as a whole. Blank and malformed lines are skipped.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, chunk: bytes) -> list[dict]:
+        """Add a chunk and return the events from every line it completed."""
+        buf = self._buf
+        scan_from = len(buf)
+        buf += chunk
+        events = []
+        start = 0
+        view = memoryview(buf)
+        try:
+            while True:
+                end = buf.find(b"\n", scan_from)
+                if end < 0:
+                    break
+                event = self._parse(view[start:end])
+                if event is not None:
+                    events.append(event)
+                start = scan_from = end + 1
+        finally:
+            view.release()
+        if start:
+            del buf[:start]
+        return events
+
+    def close(self) -> list[dict]:
+        """Return the event on a final unterminated line, if any."""
+        if not self._buf:
+            return []
+        event = self._parse(memoryview(self._buf))
+        self._buf = bytearray()
+        return [event] if event is not None else []
+
+    @staticmethod
+    def _parse(line: memoryview) -> dict | None:
+        raw = line.tobytes().strip()
+        if not raw:
+            return None
+        try:
+            event = json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        return event if isinstance(event, dict) else None
+
+
+class TriggerDetector:
+    """Decide from stream-json events whether the skill was triggered.
+
+    Early detection uses the partial-message stream: the first tool_use block
+    decides the outcome — a Skill or Read call whose streamed input mentions
+    the command name triggers, anything else does not. The full assistant
+    message and the final result event are fallbacks for when partial
+    messages are missing.
+
+    Only a short tail of the streamed tool input is kept (enough to catch the
+    name split across deltas) instead of accumulating the whole JSON.
+
+    Once decided, detected_by names the event type that settled it:
+    "stream_event" for early detection, "assistant" or "result" for the
+    fallbacks.
+    """
+
+    def __init__(self, clean_name: str):
+        self.clean_name = clean_name
+        self.pending_tool_name: str | None = None
+        self.detected_by: str | None = None
+        self._tail = ""
+
+    def _input_mentions_name(self, partial_json: str) -> bool:
+        window = self._tail + partial_json
+        if self.clean_name in window:
+            return True
+        keep = len(self.clean_name) - 1
+        self._tail = window[-keep:] if keep > 0 else ""
+        return False
+
+    def feed(self, event: dict) -> bool | None:
+        """Process one event; return the decision once known, else None."""
+        decision = self._decide(event)
+        if decision is not None:
+            self.detected_by = event.get("type")
+        return decision
+
+    def _decide(self, event: dict) -> bool | None:
+        event_type = event.get("type")
+
+        # Early detection via stream events
+        if event_type == "stream_event":
+            se = event.get("event", {})
+            se_type = se.get("type", "")
+
+            if se_type == "content_block_start":
+                cb = se.get("content_block", {})
+                if cb.get("type") == "tool_use":
+                    if cb.get("name", "") not in ("Skill", "Read"):
+                        return False
+                    self.pending_tool_name = cb["name"]
+                    self._tail = ""
+
+            elif se_type == "content_block_delta" and self.pending_tool_name:
+                delta = se.get("delta", {})
+                if delta.get("type") == "input_json_delta":
+                    if self._input_mentions_name(delta.get("partial_json", "")):
+                        return True
+
+            elif se_type in ("content_block_stop", "message_stop"):
+                # End of the tool input without a match, or a turn with no tool call
+                if self.pending_tool_name or se_type == "message_stop":
+                    return False
+
+        # Fallback: full assistant message
+        elif event_type == "assistant":
+            message = event.get("message", {})
+            for content_item in message.get("content", []):
+                if content_item.get("type") != "tool_use":
+                    continue
+                tool_name = content_item.get("name", "")
+                tool_input = content_item.get("input", {})
+                if tool_name == "Skill":
+                    return self.clean_name in tool_input.get("skill", "")
+                if tool_name == "Read":
+                    return self.clean_name in tool_input.get("file_path", "")
+                return False
+
+        elif event_type == "result":
+            return False
+
+        return None
+
+
+class SkillChoiceDetector:
+    """Decide which of several installed commands, if any, a probe chose.
+
+    Runs one TriggerDetector per command name over the same events: the
+    first to report a trigger names the choice, and once every one of them
+    has decided against, nothing was chosen. feed() returns None while
+    undecided, then the chosen clean name, or "" for none.
+    """
+
+    def __init__(self, clean_names: list[str]):
+        self._undecided = {name: TriggerDetector(name) for name in clean_names}
+        self.detected_by: str | None = None
+
+    def feed(self, event: dict) -> str | None:
+        for name, detector in list(self._undecided.items()):
+            decision = detector.feed(event)
+            if decision:
+                self.detected_by = detector.detected_by
+                return name
+            if decision is not None:
+                del self._undecided[name]
+        if not self._undecided:
+            self.detected_by = event.get("type")
+            return ""
+        return None
+
+
+# List prices in USD per million tokens (input, output) by model family, used
+# only to estimate the cost of probes killed before their result event.
+PRICES_PER_MTOK = {
+    "opus": (15.0, 75.0),
+    "sonnet": (3.0, 15.0),
+    "haiku": (1.0, 5.0),
+}
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+
+USAGE_FIELDS = ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens", "output_tokens")
+
+
+def estimate_cost(usage: dict, model: str | None) -> float:
+    """Estimate the USD cost of a usage dict from list prices."""
+    family = next((f for f in PRICES_PER_MTOK if model and f in model), "sonnet")
+    input_price, output_price = PRICES_PER_MTOK[family]
+    cost = (
+        usage.get("input_tokens", 0) * input_price
+        + usage.get("cache_creation_input_tokens", 0) * input_price * CACHE_WRITE_MULTIPLIER
+        + usage.get("cache_read_input_tokens", 0) * input_price * CACHE_READ_MULTIPLIER
+        + usage.get("output_tokens", 0) * output_price
+    )
+    return cost / 1_000_000
+
+
+class UsageMeter:
+    """Collect token usage and cost from stream-json events.
+
+    The result event carries the authoritative usage and total_cost_usd, but
+    probes are usually killed as soon as the trigger decision is known, long
+    before it. Until then usage is pieced together from the partial-message
+    stream: input and cache tokens from each message_start, output tokens from
+    message_delta (or ~4 characters per token of streamed text and tool input
+    if the process died before that), and the cost from list prices. Such
+    records are flagged estimated.
+    """
+
+    def __init__(self):
+        self.model: str | None = None
+        self._done = {field: 0 for field in USAGE_FIELDS}
+        self._current = {field: 0 for field in USAGE_FIELDS}
+        self._current_reported = False
+        self._current_chars = 0
+        self._result: dict | None = None
+        self.seen = False
+
+    def _close_message(self) -> None:
+        if not self._current_reported:
+            self._current["output_tokens"] = max(self._current["output_tokens"], self._current_chars // 4)
+        for field in USAGE_FIELDS:
+            self._done[field] += self._current[field]
+        self._current = {field: 0 for field in USAGE_FIELDS}
+        self._current_reported = False
+        self._current_chars = 0
+
+    def feed(self, event: dict) -> None:
+        event_type = event.get("type")
+        if event_type == "system":
+            self.model = event.get("model") or self.model
+        elif event_type == "stream_event":
+            se = event.get("event", {})
+            se_type = se.get("type", "")
+            if se_type == "message_start":
+                self._close_message()
+                message = se.get("message", {})
+                self.model = message.get("model") or self.model
+                usage = message.get("usage", {})
+                for field in USAGE_FIELDS:
+                    self._current[field] = usage.get(field, 0) or 0
+                self.seen = True
+            elif se_type == "message_delta":
+                output = se.get("usage", {}).get("output_tokens")
+                if output is not None:
+                    self._current["output_tokens"] = output
+                    self._current_reported = True
+            elif se_type == "content_block_delta":
+                delta = se.get("delta", {})
+                self._current_chars += len(delta.get("text", "")) + len(delta.get("partial_json", ""))
+        elif event_type == "result":
+            usage = event.get("usage") or {}
+            self._result = {field: usage.get(field, 0) or 0 for field in USAGE_FIELDS}
+            self._result["cost_usd"] = event.get("total_cost_usd")
+            self.seen = True
+
+    def record(self) -> dict | None:
+        """Return the usage so far, or None if no event carried any."""
+        if not self.seen:
+            return None
+        if self._result is not None:
+            usage = dict(self._result)
+            if usage["cost_usd"] is None:
+                usage["cost_usd"] = round(estimate_cost(usage, self.model), 6)
+                usage["estimated"] = True
+            else:
+                usage["estimated"] = False
+            return usage
+        self._close_message()
+        usage = dict(self._done)
+        usage["cost_usd"] = round(estimate_cost(usage, self.model), 6)
+        usage["estimated"] = True
+        return usage
+
+
+def sum_usage(usages: list[dict | None]) -> dict:
+    """Add up UsageMeter records, or sums of them, into one sum.
+
+    probes counts the records that carried usage; probes whose output held no
+    usage at all (None) are skipped.
+    """
+    total = {field: 0 for field in USAGE_FIELDS}
+    total.update({"cost_usd": 0.0, "probes": 0, "estimated_probes": 0})
+    for usage in usages:
+        if not usage:
+            continue
+        for field in USAGE_FIELDS:
+            total[field] += usage.get(field, 0)
+        total["cost_usd"] += usage.get("cost_usd") or 0.0
+        if "probes" in usage:
+            total["probes"] += usage["probes"]
+            total["estimated_probes"] += usage["estimated_probes"]
+        else:
+            total["probes"] += 1
+            total["estimated_probes"] += bool(usage.get("estimated"))
+    total["cost_usd"] = round(total["cost_usd"], 6)
+    return total
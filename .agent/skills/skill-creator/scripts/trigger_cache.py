@@ -0,0 +1,55 @@
+"""On-disk cache of trigger outcomes for run_eval.
+
+Each (skill name, description, query, model, run index) probe is stored as a
+small JSON file addressed by the hash of that tuple, so re-evaluating an
+identical description — the held-out test set on every run_loop iteration, or
+a whole restarted run — is served from disk instead of spawning `claude -p`.
+"""
+
+import json
+from pathlib import Path
+
+from scripts.disk_cache import DiskCache, sha256_hex
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+
+class TriggerCache(DiskCache):
+    """Content-addressed store of trigger outcomes with size/age eviction."""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        super().__init__(cache_dir, max_bytes, max_age)
+
+    @staticmethod
+    def key(skill_name: str, description: str, query: str, model: str | None, run_idx: int) -> str:
+        """Return the content address for one probe."""
+        return sha256_hex(json.dumps([skill_name, sha256_hex(description), query, model or "", run_idx]))
+
+    def get(self, skill_name: str, description: str, query: str, model: str | None, run_idx: int) -> bool | None:
+        """Return the cached outcome, or None on a miss or expired entry."""
+        entry = self._read(self.key(skill_name, description, query, model, run_idx))
+        return None if entry is None else bool(entry["triggered"])
+
+    def put(
+        self,
+        skill_name: str,
+        description: str,
+        query: str,
+        model: str | None,
+        run_idx: int,
+        triggered: bool,
+    ) -> None:
+        """Store one outcome."""
+        self._write(self.key(skill_name, description, query, model, run_idx), {
+            "skill_name": skill_name,
+            "query": query,
+            "model": model,
+            "run_idx": run_idx,
+            "triggered": triggered,
+        })
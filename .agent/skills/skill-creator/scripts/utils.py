@@ -1,5 +1,6 @@
 """Shared utilities for skill-creator scripts."""
 
+import math
 from pathlib import Path
 
 
@@ -45,3 +46,31 @@ def parse_skill_md(skill_path: Path) -> tuple[str, str, str]:
         i += 1
 
     return name, description, content
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile of values, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def find_skills(skills_root: Path, eval_sets_dir: Path, only: list[str] | None = None) -> tuple[list[tuple[Path, Path]], list[str]]:
+    """Pair each skill directory with its eval set, <eval_sets_dir>/<skill>.json.
+
+    Returns the (skill_dir, eval_set_path) pairs and the names of skills
+    skipped for lack of an eval set.
+    """
+    pairs = []
+    skipped = []
+    for skill_dir in sorted(p for p in skills_root.iterdir() if (p / "SKILL.md").exists()):
+        if only and skill_dir.name not in only:
+            continue
+        eval_path = eval_sets_dir / f"{skill_dir.name}.json"
+        if eval_path.exists():
+            pairs.append((skill_dir, eval_path))
+        else:
+            skipped.append(skill_dir.name)
+    return pairs, skipped
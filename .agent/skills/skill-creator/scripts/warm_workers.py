@@ -0,0 +1,264 @@
+"""Warm `claude` sessions for run_eval trigger probes.
+
+A one-shot `claude -p` pays full CLI startup (auth, config, command scan)
+before its first token, which dominates short trigger decisions. This engine
+keeps one long-lived CLI per sandbox slot, started with
+`--input-format stream-json`, and feeds it one query per turn:
+
+1. write the query as a user message and watch the stream for the decision
+2. interrupt the turn (control_request) and drain it up to its result event,
+   which reports the turn's exact usage and cost
+3. send /clear so the next query starts a fresh conversation
+
+A session is restarted when its sandbox's command file changes (the CLI reads
+commands at startup) and closed if a turn or reset misbehaves. If the CLI
+doesn't keep a streaming session alive at all, the engine falls back to
+one-shot run_single_query for the rest of the run.
+"""
+
+import json
+import os
+import select
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.run_eval import ProbeTimeout, claude_env, probe_record, run_single_query
+from scripts.stream_json import NDJSONReader, TriggerDetector, UsageMeter
+
+# How long to wait for an interrupted turn or a /clear to finish
+RESET_TIMEOUT = 15
+
+
+class SessionError(RuntimeError):
+    """The warm session stopped behaving and must be discarded."""
+
+
+class WarmSession:
+    """One long-lived `claude` process bound to a sandbox project root."""
+
+    def __init__(self, project_root: str, clean_name: str, model: str | None):
+        self.project_root = project_root
+        self.clean_name = clean_name
+        self.model = model
+        cmd = [
+            "claude",
+            "-p",
+            "--input-format", "stream-json",
+            "--output-format", "stream-json",
+            "--verbose",
+            "--include-partial-messages",
+        ]
+        if model:
+            cmd.extend(["--model", model])
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=project_root,
+            env=claude_env(),
+        )
+        self._fd = self.process.stdout.fileno()
+        self._reader = NDJSONReader()
+        self._pending: list[dict] = []
+        self.queries = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def _send(self, message: dict) -> None:
+        try:
+            self.process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise SessionError(f"session stdin closed: {e}") from None
+
+    def _send_user(self, text: str) -> None:
+        self._send({"type": "user", "message": {"role": "user", "content": text}})
+
+    def _next_event(self, deadline: float) -> dict | None:
+        """Return the next event, None at end of output; raise TimeoutError past deadline."""
+        while not self._pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self._fd], [], [], remaining)[0]:
+                raise TimeoutError
+            chunk = os.read(self._fd, 65536)
+            if not chunk:
+                self._pending.extend(self._reader.close())
+                if not self._pending:
+                    return None
+                break
+            self._pending.extend(self._reader.feed(chunk))
+        return self._pending.pop(0)
+
+    def _drain_turn(self, timeout: float, meter: UsageMeter | None = None) -> None:
+        """Consume events up to and including the turn's result event, feeding meter."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                event = self._next_event(deadline)
+            except TimeoutError:
+                raise SessionError("turn did not finish after interrupt") from None
+            if event is None:
+                raise SessionError("session exited mid-turn")
+            if meter is not None:
+                meter.feed(event)
+            if event.get("type") == "result":
+                return
+
+    def ask(self, query: str, timeout: float) -> tuple[dict, float | None, float]:
+        """Run one trigger probe in this session; return its probe_record() and
+        the monotonic times of its first event and of the decision.
+
+        Raises ProbeTimeout if undecided within timeout, and SessionError if
+        the session ends, cannot be reset, or never answers its first query;
+        either way the session is spent.
+        """
+        started = time.monotonic()
+        deadline = started + timeout
+        detector = TriggerDetector(self.clean_name)
+        meter = UsageMeter()
+        first_event = None
+        turn_over = False
+        self._send_user(query)
+        while True:
+            try:
+                event = self._next_event(deadline)
+            except TimeoutError:
+                if first_event is None and self.queries == 0:
+                    # Older CLIs read stdin to EOF before answering anything
+                    raise SessionError("new session produced no output") from None
+                raise ProbeTimeout(
+                    f"no trigger decision within {timeout}s",
+                    {"spawn_s": 0.0,
+                     "first_event_s": round(first_event - started, 3) if first_event else None,
+                     "usage": meter.record()},
+                ) from None
+            if event is None:
+                raise SessionError("session exited before deciding")
+            first_event = first_event or time.monotonic()
+            meter.feed(event)
+            decision = detector.feed(event)
+            if decision is not None:
+                turn_over = event.get("type") == "result"
+                break
+        decided = time.monotonic()
+
+        # Stop the rest of the turn (tool execution, more generation), then
+        # start the next query from an empty conversation.
+        if not turn_over:
+            self._send({
+                "type": "control_request",
+                "request_id": f"req_{uuid.uuid4().hex[:8]}",
+                "request": {"subtype": "interrupt"},
+            })
+            self._drain_turn(RESET_TIMEOUT, meter)
+        self._send_user("/clear")
+        self._drain_turn(RESET_TIMEOUT)
+        self.queries += 1
+
+        record = probe_record(
+            decision, detector.detected_by, started, started, first_event, decided,
+            killed=False, usage=meter.record(),
+        )
+        record["warm"] = True
+        return record, first_event, decided
+
+    def close(self) -> None:
+        if self.alive:
+            self.process.kill()
+        self.process.wait()
+
+
+class WarmExecutor(ThreadPoolExecutor):
+    """Thread pool whose probes reuse one warm session per sandbox.
+
+    run_query has run_single_query's signature, so run_eval submits it the
+    same way; project_root identifies the sandbox and therefore the session.
+    """
+
+    def __init__(self, max_workers: int):
+        super().__init__(max_workers=max_workers)
+        self._sessions: dict[str, WarmSession] = {}
+        self._installed: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.supported = True
+        self.sessions_started = 0
+        self.turns_completed = 0
+
+    def _session_for(self, project_root: str, clean_name: str, description: str, model: str | None) -> WarmSession:
+        with self._lock:
+            session = self._sessions.get(project_root)
+            stale = (
+                session is None
+                or not session.alive
+                or session.clean_name != clean_name
+                or session.model != model
+                or self._installed.get(project_root) != description
+            )
+            if not stale:
+                return session
+            if session is not None:
+                session.close()
+            session = WarmSession(project_root, clean_name, model)
+            self._sessions[project_root] = session
+            self._installed[project_root] = description
+            self.sessions_started += 1
+        return session
+
+    def _discard(self, project_root: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(project_root, None)
+        if session is not None:
+            session.close()
+
+    def run_query(
+        self,
+        query: str,
+        skill_name: str,
+        skill_description: str,
+        timeout: int,
+        project_root: str,
+        model: str | None = None,
+        clean_name: str | None = None,
+    ) -> dict:
+        """Probe via the sandbox's warm session, or one-shot if unsupported."""
+        if not self.supported or clean_name is None:
+            return run_single_query(query, skill_name, skill_description, timeout, project_root, model, clean_name)
+
+        started = time.monotonic()
+        session = self._session_for(project_root, clean_name, skill_description, model)
+        fresh = session.queries == 0
+        try:
+            record, first_event, decided = session.ask(query, timeout)
+        except ProbeTimeout:
+            self._discard(project_root)
+            raise
+        except SessionError:
+            self._discard(project_root)
+            if fresh and not self.turns_completed:
+                # No session has ever completed a turn: this CLI doesn't do
+                # streaming input, so stop trying.
+                self.supported = False
+            return run_single_query(query, skill_name, skill_description, timeout, project_root, model, clean_name)
+        self.turns_completed += 1
+        if fresh:
+            # Charge the session's startup, up to its first event, to the
+            # probe that paid for it; the reset after the decision isn't part of it
+            record["spawn_s"] = round(first_event - started, 3) if first_event else 0.0
+            record["first_event_s"] = record["spawn_s"] if first_event else None
+            record["decision_s"] = round(decided - started, 3)
+            record["warm"] = False
+        return record
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()